@@ -0,0 +1,74 @@
+"""
+批量导出吞吐量基准测试
+
+在临时目录中生成 N 个素材文件，分别以 ZIP 与 JSONL 格式流式导出，
+统计耗时、吞吐量以及导出过程中的 Python 内存峰值。
+
+用法: python bench/export_throughput.py [素材数量]
+"""
+import asyncio
+import datetime
+import pathlib
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent / "src"))
+
+from core import export  # noqa: E402
+
+SAMPLE = ("## 素材标题\n\n### 简介:\n" + "素材摘要内容。" * 40 + "\n\n### 适用主题:\n社会责任, 科技创新\n\n### 例文：\n"
+          + "".join(f"例文{i}\n" + "例文段落内容。" * 50 + "\n\n" for i in range(1, 4))
+          + "> 更新时间: 2025-01-01 10:00\n>\n> 来源: 中国新闻网 (https://www.chinanews.com.cn/)")
+
+
+def seed(root: pathlib.Path, count: int) -> list[export.ExportRow]:
+    rows = []
+    base = datetime.datetime(2025, 1, 1)
+    for i in range(count):
+        created = base + datetime.timedelta(minutes=i)
+        date = created.strftime("%Y-%m-%d")
+        md_id = f"{i:032x}"
+        path = f"{date[:7].replace('-', '/')}/{date}_{md_id}.md"
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_text(SAMPLE, encoding="utf-8")
+        rows.append(export.ExportRow(md_id, date, path, "素材标题", "社会责任, 科技创新", created))
+    return rows
+
+
+async def source(rows: list[export.ExportRow]):
+    for row in rows:
+        yield row
+
+
+async def zip_stream(rows: list[export.ExportRow], root: pathlib.Path):
+    async for chunk in export.stream_zip(await export.snapshot(source(rows), root), root):
+        yield chunk
+
+
+async def run(name: str, make_stream, rows: list[export.ExportRow], root: pathlib.Path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = 0
+    async for chunk in make_stream(rows, root):
+        size += len(chunk)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:>6}: {size / 1024 / 1024:.1f}MB, {elapsed:.2f}s, "
+          f"{size / 1024 / 1024 / elapsed:.1f}MB/s, {len(rows) / elapsed:.0f} 条/秒, "
+          f"内存峰值 {peak / 1024 / 1024:.1f}MB")
+
+
+async def main(count: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        root = pathlib.Path(tmp)
+        print(f"生成 {count} 个素材文件...")
+        rows = seed(root, count)
+        await run("zip", zip_stream, rows, root)
+        await run("jsonl", lambda rows_, root_: export.stream_jsonl(source(rows_), root_), rows, root)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000))
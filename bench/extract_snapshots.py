@@ -0,0 +1,55 @@
+"""
+文章解析基准测试
+
+使用 data/snapshots 中保存的网页快照运行新闻源的解析函数，完全不访问网络，
+统计解析耗时以及通过本地过滤的文章比例。
+
+用法: python bench/extract_snapshots.py [新闻源名称] [最多条数]
+"""
+import asyncio
+import itertools
+import pathlib
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent / "src"))
+
+from gen import news  # noqa: E402
+from gen.news import snapshots  # noqa: E402
+
+
+async def main(name: str, limit: int):
+    source = news.sources.get(name)
+    if source is None:
+        print(f"未知的新闻源: {name}，可用: {', '.join(news.sources)}")
+        return
+    urls = list(itertools.islice(snapshots.urls(), limit))
+    if not urls:
+        print("没有网页快照，先运行一段时间生成器")
+        return
+
+    parsed = passed = failed = 0
+    start = time.perf_counter()
+    with snapshots.offline():
+        for url in urls:
+            try:
+                article = await source.parse(url)
+            except Exception as e:
+                failed += 1
+                print(f"解析出错 {url}: {e}")
+                continue
+            if article is None:
+                failed += 1
+                continue
+            parsed += 1
+            passed += news.filter_article(article)
+    elapsed = time.perf_counter() - start
+    print(f"{len(urls)} 个快照, 解析成功 {parsed}, 失败 {failed}, 通过过滤 {passed}")
+    print(f"耗时 {elapsed:.2f}s, 每篇 {elapsed / len(urls) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        sys.argv[1] if len(sys.argv) > 1 else "chinanews",
+        int(sys.argv[2]) if len(sys.argv) > 2 else 1000,
+    ))
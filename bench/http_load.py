@@ -0,0 +1,351 @@
+"""
+HTTP 负载基准测试
+
+在临时数据目录中写入 N 条素材，用本地 uvicorn 子进程启动应用，依次压测:
+    view        GET /view/{md_id}，随机素材
+    articles    GET /api/articles，随机页码
+    login       POST /login，包含 bcrypt 校验
+    sse         GET /api/generator/logs，多个订阅者同时接收日志，统计从写入日志到送达的延迟
+统计每个接口的吞吐量与 P50/P99 延迟，结果保存为 JSON，可用 --compare 与之前的结果对比。
+
+用法: python bench/http_load.py [--materials N] [--output 结果.json] [--compare 旧结果.json]
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import os
+import pathlib
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+import uuid
+
+ROOT = pathlib.Path(__file__).parent.parent
+SRC = ROOT / "src"
+sys.path.insert(0, str(SRC))
+
+import aiohttp  # noqa: E402
+
+THEMES = ("社会责任", "科技创新", "环境保护", "文化传承", "奋斗精神", "家国情怀", "诚信", "青年担当", "乡村振兴", "教育公平")
+WORDS = "志愿者坚守岗位科研团队突破关键技术非遗传承人匠心守护乡村教师扎根山区青年创业生态修复航天工程公益行动"
+# 服务端写入的基准日志前缀，后面跟写入时的时间戳
+SSE_MARK = "BENCH_SSE "
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def summarize(latencies: list[float], elapsed: float, errors: int) -> dict:
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+# --------------------
+# 准备数据
+# --------------------
+
+async def seed(count: int) -> list[str]:
+    """
+    写入 count 条素材，返回素材 id。直接批量写库，不触发相似素材索引与静态发布
+    """
+    from sqlalchemy import insert
+
+    from db import db
+    from db.models import Markdown
+    from gen.post_processing import render_markdown
+
+    await db.init_db()
+    rng = random.Random(0)
+    today = datetime.date.today()
+    rows = []
+    for i in range(count):
+        md_id = uuid.UUID(int=rng.getrandbits(128)).hex
+        date = (today - datetime.timedelta(days=i % 365)).isoformat()
+        material = types.SimpleNamespace(
+            title="".join(rng.choices(WORDS, k=12)),
+            summary="".join(rng.choices(WORDS, k=200)),
+            themes=", ".join(rng.sample(THEMES, 3)),
+            example=["".join(rng.choices(WORDS, k=800)) for _ in range(3)],
+        )
+        folder = db.files_path / date[:7].replace("-", "/")
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / f"{date}_{md_id}.md"
+        path.write_text(render_markdown(material, date, "bench", f"https://example.com/{md_id}"), encoding="utf-8")
+        rows.append({
+            "id": md_id, "date": date, "path": str(path.relative_to(db.files_path)),
+            "title": material.title, "themes": material.themes, "source": "bench",
+        })
+    async with db.AsyncSessionLocal() as session:
+        for i in range(0, len(rows), 1000):
+            await session.execute(insert(Markdown), rows[i:i + 1000])
+        await session.commit()
+    await db.engine.dispose()
+    return [row["id"] for row in rows]
+
+
+# --------------------
+# 服务端
+# --------------------
+
+def serve(port: int):
+    """
+    子进程入口: 启动应用，并从标准输入读取 "emit <次数> <间隔秒>" 命令写入基准日志
+    """
+    import uvicorn
+
+    os.chdir(SRC)
+    import main
+    from core.logger import sse_handler
+
+    # 基准日志只交给 SSE，不输出到终端与日志文件
+    bench_logger = logging.getLogger("bench")
+    bench_logger.propagate = False
+    bench_logger.addHandler(sse_handler)
+
+    def read_commands():
+        for line in sys.stdin:
+            _, count, interval = line.split()
+            for _ in range(int(count)):
+                bench_logger.info(f"{SSE_MARK}{time.time():.6f}")
+                time.sleep(float(interval))
+
+    threading.Thread(target=read_commands, daemon=True).start()
+    uvicorn.run(main.app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def wait_ready(base_url: str, proc: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            if proc.poll() is not None:
+                raise RuntimeError(f"服务进程已退出: {proc.returncode}")
+            try:
+                async with session.get(f"{base_url}/login") as resp:
+                    if resp.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise TimeoutError("服务启动超时")
+
+
+# --------------------
+# 压测
+# --------------------
+
+async def load(session: aiohttp.ClientSession, make_request, total: int, concurrency: int) -> dict:
+    """
+    以 concurrency 个并发请求共发出 total 个请求。make_request(i) 返回 (方法, 地址, 参数)
+    """
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            method, url, kwargs = make_request(i)
+            start = time.perf_counter()
+            try:
+                async with session.request(method, url, allow_redirects=False, **kwargs) as resp:
+                    await resp.read()
+                    ok = resp.status < 400
+            except aiohttp.ClientError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+
+async def login(session: aiohttp.ClientSession, base_url: str) -> str:
+    data = {"username": "admin", "password": "THEPassword"}
+    async with session.post(f"{base_url}/login", data=data, allow_redirects=False) as resp:
+        if resp.status != 302 or "token" not in resp.cookies:
+            raise RuntimeError(f"登录失败: {resp.status}")
+        return resp.cookies["token"].value
+
+
+async def bench_sse(base_url: str, proc: subprocess.Popen, subscribers: int, messages: int, interval: float) -> dict:
+    delays: list[float] = []
+    ready = asyncio.Event()
+    connected = 0
+
+    async def subscriber(session: aiohttp.ClientSession):
+        nonlocal connected
+        received = 0
+        async with session.get(f"{base_url}/api/generator/logs") as resp:
+            connected += 1
+            if connected == subscribers:
+                ready.set()
+            async for line in resp.content:
+                text = line.decode("utf-8")
+                if not text.startswith("data:") or SSE_MARK not in text:
+                    continue
+                delays.append(time.time() - float(text.rsplit(SSE_MARK, 1)[1]))
+                received += 1
+                if received == messages:
+                    return
+
+    connector = aiohttp.TCPConnector(limit=0)
+    timeout = aiohttp.ClientTimeout(total=None, sock_read=messages * interval + 30)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        tasks = [asyncio.create_task(subscriber(session)) for _ in range(subscribers)]
+        await asyncio.wait_for(ready.wait(), 30)
+        proc.stdin.write(f"emit {messages} {interval}\n")
+        proc.stdin.flush()
+        start = time.perf_counter()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        elapsed = time.perf_counter() - start
+
+    return {
+        "subscribers": subscribers,
+        "messages": messages,
+        "delivered": len(delays),
+        "failed_subscribers": sum(isinstance(r, BaseException) for r in results),
+        "elapsed_s": round(elapsed, 2),
+        "p50_ms": round(percentile(delays, 0.5) * 1000, 2),
+        "p99_ms": round(percentile(delays, 0.99) * 1000, 2),
+        "max_ms": round(max(delays, default=0) * 1000, 2),
+    }
+
+
+async def run(args, ids: list[str], base_url: str, proc: subprocess.Popen) -> dict:
+    rng = random.Random(1)
+    pages = max(1, len(ids) // args.page_size)
+    results = {}
+
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        headers = {"Cookie": f"token={await login(session, base_url)}"}
+        form = {"username": "admin", "password": "THEPassword"}
+        cases = {
+            "view": (args.requests, lambda i: ("GET", f"{base_url}/view/{rng.choice(ids)}", {"headers": headers})),
+            "articles": (args.requests, lambda i: (
+                "GET", f"{base_url}/api/articles/",
+                {"headers": headers, "params": {"page": rng.randint(1, pages), "page_size": args.page_size}}
+            )),
+            "login": (args.login_requests, lambda i: ("POST", f"{base_url}/login", {"data": form})),
+        }
+        for name, (total, make_request) in cases.items():
+            # 预热，避免首次请求的模板编译与连接建立计入结果
+            await load(session, make_request, min(total, args.concurrency), args.concurrency)
+            results[name] = await load(session, make_request, total, args.concurrency)
+            print(f"{name:>8}: {results[name]['rps']:.1f} 次/秒, "
+                  f"P50 {results[name]['p50_ms']:.2f}ms, P99 {results[name]['p99_ms']:.2f}ms, "
+                  f"错误 {results[name]['errors']}")
+
+    results["sse"] = await bench_sse(base_url, proc, args.subscribers, args.messages, args.interval)
+    sse = results["sse"]
+    print(f"{'sse':>8}: {sse['subscribers']} 个订阅者, 送达 {sse['delivered']}/{sse['subscribers'] * sse['messages']}, "
+          f"P50 {sse['p50_ms']:.2f}ms, P99 {sse['p99_ms']:.2f}ms, 最大 {sse['max_ms']:.2f}ms")
+    return results
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(old: dict, new: dict):
+    print(f"与 {old.get('revision') or '旧结果'} 对比:")
+    for name, current in new["results"].items():
+        previous = old.get("results", {}).get(name)
+        if not previous:
+            continue
+        parts = []
+        for key in ("rps", "p50_ms", "p99_ms"):
+            if key in current and previous.get(key):
+                change = (current[key] - previous[key]) / previous[key] * 100
+                parts.append(f"{key} {previous[key]} -> {current[key]} ({change:+.1f}%)")
+        print(f"{name:>8}: " + ", ".join(parts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP 负载基准测试")
+    parser.add_argument("--materials", type=int, default=10000, help="写入的素材数量")
+    parser.add_argument("--requests", type=int, default=2000, help="每个接口的请求数")
+    parser.add_argument("--login-requests", type=int, default=100, help="登录请求数，bcrypt 较慢因此单独设置")
+    parser.add_argument("--concurrency", type=int, default=32, help="并发请求数")
+    parser.add_argument("--page-size", type=int, default=20, help="/api/articles 每页数量")
+    parser.add_argument("--subscribers", type=int, default=200, help="SSE 订阅者数量")
+    parser.add_argument("--messages", type=int, default=50, help="SSE 日志条数")
+    parser.add_argument("--interval", type=float, default=0.02, help="SSE 日志间隔秒数")
+    parser.add_argument("--output", help="结果 JSON 路径，默认 http_load_<时间>.json")
+    parser.add_argument("--compare", help="与之前保存的结果 JSON 对比")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # 服务进程与当前进程都使用临时数据目录
+        os.environ["MATERIALGEN_DATA"] = tmp
+        start = time.perf_counter()
+        ids = asyncio.run(seed(args.materials))
+        print(f"写入素材: {len(ids)} 条, {time.perf_counter() - start:.1f}s")
+
+        port = free_port()
+        proc = subprocess.Popen(
+            [sys.executable, str(pathlib.Path(__file__).resolve()), "--serve", str(port)],
+            stdin=subprocess.PIPE, text=True,
+        )
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            asyncio.run(wait_ready(base_url, proc))
+            results = asyncio.run(run(args, ids, base_url, proc))
+        finally:
+            proc.terminate()
+            proc.wait(10)
+
+    report = {
+        "revision": git_revision(),
+        "time": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare", "serve")},
+        "results": results,
+    }
+    output = pathlib.Path(args.output or f"http_load_{time.strftime('%Y%m%d-%H%M%S')}.json")
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"结果已保存: {output}")
+
+    if args.compare:
+        compare(json.loads(pathlib.Path(args.compare).read_text(encoding="utf-8")), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+登录吞吐量基准测试
+
+对比同步 bcrypt 校验与线程池校验的吞吐量，以及并发登录期间事件循环的最大阻塞时间。
+
+用法: python bench/login_throughput.py [并发数]
+"""
+import asyncio
+import pathlib
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent / "src"))
+
+from core import user  # noqa: E402
+
+
+async def _loop_lag_probe(stop: asyncio.Event, interval: float = 0.01) -> float:
+    # 记录事件循环的最大延迟
+    max_lag = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        max_lag = max(max_lag, time.perf_counter() - start - interval)
+    return max_lag
+
+
+async def _run(name: str, verify, hashed: str, concurrency: int):
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_loop_lag_probe(stop))
+    await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(verify("THEPassword", hashed) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    max_lag = await probe
+    print(f"{name:>8}: {concurrency} 次登录 {elapsed:.2f}s, "
+          f"{concurrency / elapsed:.1f} 次/秒, 事件循环最大阻塞 {max_lag * 1000:.0f}ms")
+
+
+async def main(concurrency: int):
+    hashed = user.hash_password("THEPassword")
+
+    async def sync_verify(plain, hashed_):
+        return user.verify_password(plain, hashed_)
+
+    await _run("sync", sync_verify, hashed, concurrency)
+    await _run("pool", user.verify_password_async, hashed, concurrency)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 16))
@@ -0,0 +1,58 @@
+"""
+相似素材查询基准测试
+
+在临时目录中为 N 条生成的素材建立索引，统计建立索引、逐条增量添加与 top-k 查询的耗时。
+
+用法: python bench/related_query.py [素材数量]
+"""
+import pathlib
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent / "src"))
+
+from core import related  # noqa: E402
+
+THEMES = ("社会责任", "科技创新", "环境保护", "文化传承", "奋斗精神", "家国情怀", "诚信", "青年担当", "乡村振兴", "教育公平")
+WORDS = "志愿者坚守岗位科研团队突破关键技术非遗传承人匠心守护乡村教师扎根山区青年创业生态修复航天工程公益行动"
+QUERIES = 200
+ADDS = 200
+
+
+def sample(rng: random.Random, i: int) -> tuple[str, str, str, str]:
+    title = "".join(rng.choices(WORDS, k=12))
+    summary = "".join(rng.choices(WORDS, k=200))
+    themes = ", ".join(rng.sample(THEMES, 3))
+    return f"{i:032x}", title, summary, themes
+
+
+def main(count: int):
+    rng = random.Random(0)
+    items = [sample(rng, i) for i in range(count)]
+    with tempfile.TemporaryDirectory() as tmp:
+        index = related.RelatedIndex(pathlib.Path(tmp))
+
+        start = time.perf_counter()
+        index.rebuild(items)
+        print(f"建立索引: {count} 条, {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        for i in range(ADDS):
+            index.add([sample(rng, count + i)])
+        print(f"增量添加: 每条 {(time.perf_counter() - start) / ADDS * 1000:.2f}ms")
+
+        timings = []
+        for md_id, *_ in rng.sample(items, QUERIES):
+            start = time.perf_counter()
+            index.similar(md_id, 10)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        print(f"top-10 查询: 平均 {statistics.mean(timings):.2f}ms, "
+              f"P50 {timings[len(timings) // 2]:.2f}ms, P99 {timings[int(len(timings) * 0.99)]:.2f}ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,98 @@
+"""
+RSS 积压内存基准测试
+
+分别构造 N 个积压条目：旧的字典 + 完整 FeedParserDict 形式，
+以及新的 RSSResult 记录，统计每种形式的常驻内存增量与 Python 分配量。
+每种形式在独立的子进程中测量，互不影响。
+
+用法: python bench/rss_backlog.py [条目数量]
+"""
+import gc
+import pathlib
+import subprocess
+import sys
+import tracemalloc
+
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent / "src"))
+
+FEED_URL = "https://www.chinanews.com.cn/rss/society.xml"
+PER_FEED = 100
+
+
+def sample_feed(offset: int) -> bytes:
+    items = "".join(
+        f"<item><title>新闻标题 {i}</title>"
+        f"<link>https://www.chinanews.com.cn/sh/2025/01-01/{i}.shtml</link>"
+        f"<guid>https://www.chinanews.com.cn/sh/2025/01-01/{i}.shtml</guid>"
+        f"<description><![CDATA[<p>{'新闻摘要内容。' * 30}</p>]]></description>"
+        f"<pubDate>Wed, 01 Jan 2025 10:00:00 +0800</pubDate></item>"
+        for i in range(offset, offset + PER_FEED)
+    )
+    return (f'<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel>'
+            f"<title>示例</title>{items}</channel></rss>").encode("utf-8")
+
+
+def resident() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * 4096
+
+
+def build_dict(count: int) -> list:
+    import feedparser
+
+    backlog = []
+    for offset in range(0, count, PER_FEED):
+        for entry in feedparser.parse(sample_feed(offset)).entries:
+            backlog.append({
+                "feed_url": FEED_URL,
+                "title": entry.get("title"),
+                "link": entry.get("link"),
+                "published": entry.get("published"),
+                "entry": entry,
+            })
+    return backlog
+
+
+def build_record(count: int) -> list:
+    from gen.feed_parser import parse_feed
+    from gen.rss import RSSResult
+
+    backlog = []
+    for offset in range(0, count, PER_FEED):
+        for entry in parse_feed(sample_feed(offset)):
+            backlog.append(RSSResult(
+                feed_url=FEED_URL,
+                title=entry.title,
+                link=entry.link,
+                published=entry.published,
+                summary=entry.summary,
+            ))
+    return backlog
+
+
+def measure(mode: str, count: int):
+    build = build_dict if mode == "dict" else build_record
+    # 先预热一轮，排除模块导入与解析器初始化的开销
+    build(PER_FEED)
+    gc.collect()
+    before = resident()
+    tracemalloc.start()
+    backlog = build(count)
+    gc.collect()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    after = resident()
+    print(f"{mode:>6}: {len(backlog)} 条, 常驻内存 +{(after - before) / 1024 / 1024:.1f}MB, "
+          f"Python 分配 {allocated / 1024 / 1024:.1f}MB, 每条 {allocated / len(backlog) / 1024:.1f}KB")
+
+
+def main(count: int):
+    for mode in ("dict", "record"):
+        subprocess.run([sys.executable, __file__, str(count), mode], check=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        measure(sys.argv[2], int(sys.argv[1]))
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
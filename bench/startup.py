@@ -0,0 +1,87 @@
+"""
+启动耗时基准测试
+
+使用 python -X importtime 导入 main 模块，多次运行取中位数，统计冷启动耗时、导入耗时、最慢的模块与常驻内存，
+并检查 LLM 相关依赖没有在启动时被加载。超出预算时以非零状态码退出。
+
+用法: python bench/startup.py [预算毫秒数] [运行次数]
+"""
+import pathlib
+import statistics
+import subprocess
+import sys
+import time
+
+SRC = pathlib.Path(__file__).parent.parent / "src"
+
+# 启动时不应加载的模块
+LAZY_MODULES = ("langchain_google_genai", "langchain_core", "grpc", "gen.llm_parse")
+
+PROBE = (
+    "import resource, sys\n"
+    "import main\n"
+    "print('RSS_KB', resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)\n"
+    f"print('LOADED', ','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))\n"
+)
+
+
+def parse_importtime(stderr: str) -> list[tuple[int, int, str]]:
+    # 每行格式: import time: self [us] | cumulative | imported package
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.strip()))
+    return rows
+
+
+def _probe() -> tuple[float, list[tuple[int, int, str]], dict[str, str]]:
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=SRC,
+        capture_output=True,
+        text=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        print(proc.stderr)
+        sys.exit(proc.returncode)
+    output = dict(line.split(" ", 1) for line in proc.stdout.splitlines() if " " in line)
+    return wall_ms, parse_importtime(proc.stderr), output
+
+
+def main(budget_ms: float, runs: int):
+    # 单次测量受磁盘缓存与调度影响较大，多次运行取中位数再与预算比较
+    results = [_probe() for _ in range(runs)]
+    wall_ms = statistics.median(r[0] for r in results)
+    totals = [sum(row[0] for row in r[1]) / 1000 for r in results]
+    total_ms = statistics.median(totals)
+    rss_mb = statistics.median(int(r[2].get("RSS_KB", 0)) for r in results) / 1024
+    rows, output = results[totals.index(sorted(totals)[len(totals) // 2])][1:]
+    main_ms = next((row[1] for row in rows if row[2] == "main"), 0) / 1000
+
+    print(f"{runs} 次运行的中位数:")
+    print(f"冷启动耗时（含解释器启动）: {wall_ms:.1f}ms")
+    print(f"导入总耗时: {total_ms:.1f}ms (main: {main_ms:.1f}ms, 预算: {budget_ms:.0f}ms)")
+    print(f"常驻内存峰值: {rss_mb:.1f}MB")
+    print("最慢的模块:")
+    for self_us, cumulative_us, name in sorted(rows, key=lambda r: r[1], reverse=True)[:15]:
+        print(f"  {cumulative_us / 1000:8.1f}ms  {name}")
+
+    failed = False
+    if loaded := output.get("LOADED", "").strip():
+        print(f"启动时加载了应延迟导入的模块: {loaded}")
+        failed = True
+    if total_ms > budget_ms:
+        print("超出启动耗时预算")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main(
+        float(sys.argv[1]) if len(sys.argv) > 1 else 1500,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 5,
+    )
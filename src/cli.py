@@ -0,0 +1,219 @@
+"""
+命令行工具，在不启动 Web 服务的情况下执行维护任务。
+
+用法: python src/cli.py <命令> [参数]
+"""
+import argparse
+import asyncio
+import datetime
+import logging
+import pathlib
+
+from core import static
+from db import db, storage
+
+
+async def reconcile(args: argparse.Namespace):
+    await db.init_db()
+    result = await storage.reconcile(delete_orphans=args.delete_orphans, prune_missing=args.prune_missing)
+    print(f"文件数: {result['files']}, 记录数: {result['records']}")
+    print(f"孤立文件: {len(result['orphans'])}{' (已删除)' if args.delete_orphans else ''}")
+    for path in result["orphans"][:args.show]:
+        print(f"  {path}")
+    print(f"文件缺失的记录: {len(result['missing'])}{' (已删除)' if args.prune_missing else ''}")
+    for path in result["missing"][:args.show]:
+        print(f"  {path}")
+
+
+async def vendor_assets(_: argparse.Namespace):
+    for path in await asyncio.to_thread(static.download_vendor_assets):
+        print(f"已下载: {path} -> {static.manifest[path]}")
+
+
+async def train_prefilter(args: argparse.Namespace):
+    from gen import prefilter
+
+    verdicts = prefilter.load_verdicts()
+    if len(verdicts) < args.min_samples:
+        print(f"训练数据不足: {len(verdicts)} 条，至少需要 {args.min_samples} 条")
+        return
+    accepted = sum(1 for v in verdicts if v["useful"])
+    print(f"训练数据: {len(verdicts)} 条 (通过 {accepted}, 不通过 {len(verdicts) - accepted})")
+    model, report = await asyncio.to_thread(
+        prefilter.train, verdicts, epochs=args.epochs, threshold=args.threshold
+    )
+    print(f"留出集: {report['test']} 条, 准确率 {report['accuracy']:.1%}")
+    agreement = "-" if report["agreement"] is None else f"{report['agreement']:.1%}"
+    print(f"置信度 {args.threshold} 下可省去的LLM调用: {report['coverage']:.1%}, 与LLM结论一致率: {agreement}")
+    if not args.dry_run:
+        model.save()
+        print(f"模型已保存: {prefilter.model_path}")
+
+
+async def batch(args: argparse.Namespace):
+    from core import publish
+    from gen import batch as batch_mode
+    from gen.budget import budget
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    path = pathlib.Path(args.input)
+    if not path.exists():
+        print(f"输入不存在: {path}")
+        return
+    checkpoint = pathlib.Path(args.checkpoint) if args.checkpoint else db.data_path / "batch" / f"{path.stem}.checkpoint"
+    await db.init_db()
+
+    def progress(stats: "batch_mode.BatchStats"):
+        print(f"[{stats.elapsed:7.0f}s] 已处理 {stats.done}, 跳过 {stats.skipped}, 出错 {stats.errors}, "
+              f"{stats.rate():.2f} 条/秒, 素材 {stats.results.get('accepted', 0)}, tokens {stats.tokens}")
+
+    try:
+        stats = await batch_mode.run_batch(
+            path,
+            checkpoint,
+            concurrency=args.concurrency,
+            limit=args.limit,
+            progress_interval=args.progress,
+            on_progress=progress,
+        )
+    finally:
+        budget.flush()
+        await publish.flush()
+    print(f"完成: 读取 {stats.total} 条, 检查点跳过 {stats.skipped}, 处理 {stats.done}, 出错 {stats.errors}")
+    print(f"耗时 {stats.elapsed:.1f}s, {stats.rate():.2f} 条/秒, LLM 调用 {stats.llm_calls} 次, tokens {stats.tokens}")
+    for result, count in sorted(stats.results.items()):
+        print(f"  {result}: {count}")
+    print(f"检查点: {checkpoint}")
+
+
+async def regenerate(args: argparse.Namespace):
+    from core import publish
+    from gen import load_llm, regenerate as regen
+    from gen.budget import budget
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    await db.init_db()
+    llm_parse = await load_llm()
+    if args.rate_limit is not None:
+        llm_parse.rate_limit = args.rate_limit
+    materials = await regen.select_materials(
+        start=args.start,
+        end=args.end,
+        theme=args.theme,
+        versions=args.version,
+        include_current=args.include_current,
+        limit=args.limit,
+    )
+    print(f"当前提示词版本: {llm_parse.PROMPT_VERSION}, 选中素材: {len(materials)}")
+    if args.dry_run or not materials:
+        for markdown in materials[:args.show]:
+            print(f"  {markdown.date} {markdown.id} {markdown.prompt_version or regen.LEGACY_VERSION} {markdown.title}")
+        return
+
+    def progress(stats: "regen.RegenerateStats"):
+        print(f"[{stats.elapsed:7.0f}s] {stats.done}/{stats.selected}, 失败 {stats.failed}, "
+              f"LLM 调用 {stats.llm_calls} 次, tokens {stats.tokens}")
+
+    try:
+        stats = await regen.run_regeneration(
+            materials, stages=args.stages, concurrency=args.concurrency, on_progress=progress
+        )
+    finally:
+        budget.flush()
+        await publish.flush()
+    print(f"完成: 重新生成 {stats.regenerated} (其中重跑素材阶段 {stats.material_stage}), 失败 {stats.failed}, "
+          f"耗时 {stats.elapsed:.1f}s, tokens {stats.tokens}")
+
+
+async def related_index(_: argparse.Namespace):
+    from sqlalchemy import select
+
+    from core import related
+    from db.models import Markdown
+    from gen.post_processing import parse_markdown
+
+    await db.init_db()
+    async with db.AsyncSessionLocal() as session:
+        rows = (await session.execute(select(Markdown.id, Markdown.path, Markdown.title, Markdown.themes))).all()
+
+    def read_items() -> list[tuple[str, str, str, str]]:
+        items = []
+        for row in rows:
+            try:
+                parsed = parse_markdown((db.files_path / row.path).read_text(encoding="utf-8"))
+            except OSError:
+                continue
+            items.append((row.id, row.title or "", parsed["summary"] if parsed else "", row.themes or ""))
+        return items
+
+    items = await asyncio.to_thread(read_items)
+    await asyncio.to_thread(related.index.rebuild, items)
+    print(f"已为 {len(items)} 条素材建立相似索引: {related.related_path}")
+
+
+async def publish_site(_: argparse.Namespace):
+    from core import publish
+
+    await db.init_db()
+    root, count = await publish.publish_all()
+    print(f"已发布 {count} 条素材: {publish.public_path} -> {root}")
+    if not publish.PUBLISH_ENABLED:
+        print("提示: config.PUBLISH_ENABLED 为 False，保存或删除素材时不会增量更新")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MaterialGen 命令行工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    reconcile_parser = subparsers.add_parser("reconcile", help="检查 data/files 与数据库记录是否一致")
+    reconcile_parser.add_argument("--delete-orphans", action="store_true", help="删除没有数据库记录的文件")
+    reconcile_parser.add_argument("--prune-missing", action="store_true", help="删除文件已丢失的数据库记录")
+    reconcile_parser.add_argument("--show", type=int, default=20, help="最多列出的路径数")
+    reconcile_parser.set_defaults(func=reconcile)
+
+    train_parser = subparsers.add_parser("train-prefilter", help="用历史 LLM 过滤结论训练预过滤模型")
+    train_parser.add_argument("--epochs", type=int, default=10)
+    train_parser.add_argument("--threshold", type=float, default=0.9, help="评估使用的置信度阈值")
+    train_parser.add_argument("--min-samples", type=int, default=200)
+    train_parser.add_argument("--dry-run", action="store_true", help="只评估不保存模型")
+    train_parser.set_defaults(func=train_prefilter)
+
+    batch_parser = subparsers.add_parser("batch", help="从历史存档（目录或 JSONL 文件）批量生成素材")
+    batch_parser.add_argument("input", help="RSS 存档、HTML 网页所在目录，或 JSONL 文件")
+    batch_parser.add_argument("--concurrency", type=int, default=8, help="同时处理的条目数")
+    batch_parser.add_argument("--limit", type=int, default=None, help="最多处理的条目数")
+    batch_parser.add_argument("--checkpoint", default=None, help="检查点文件，默认 data/batch/<输入名>.checkpoint")
+    batch_parser.add_argument("--progress", type=float, default=10.0, help="进度输出间隔（秒）")
+    batch_parser.set_defaults(func=batch)
+
+    regen_parser = subparsers.add_parser("regenerate", help="用当前提示词重新生成已有素材")
+    regen_parser.add_argument("--start", type=datetime.date.fromisoformat, default=None, help="起始日期")
+    regen_parser.add_argument("--end", type=datetime.date.fromisoformat, default=None, help="结束日期")
+    regen_parser.add_argument("--theme", default=None, help="主题关键词")
+    regen_parser.add_argument("--version", action="append", default=None,
+                              help="只选择该提示词版本的素材，可重复指定，legacy 表示未记录版本的旧素材")
+    regen_parser.add_argument("--include-current", action="store_true", help="同时选择已是当前版本的素材")
+    regen_parser.add_argument("--stages", choices=("auto", "examples", "all"), default="auto",
+                              help="auto 只重跑版本过期的阶段，examples 只重新生成例文，all 全部重跑")
+    regen_parser.add_argument("--concurrency", type=int, default=4, help="同时处理的素材数")
+    regen_parser.add_argument("--rate-limit", type=float, default=None, help="LLM 每秒最多请求数")
+    regen_parser.add_argument("--limit", type=int, default=None, help="最多处理的素材数")
+    regen_parser.add_argument("--dry-run", action="store_true", help="只列出选中的素材")
+    regen_parser.add_argument("--show", type=int, default=20, help="--dry-run 时最多列出的素材数")
+    regen_parser.set_defaults(func=regenerate)
+
+    related_parser = subparsers.add_parser("related-index", help="重建相似素材索引")
+    related_parser.set_defaults(func=related_index)
+
+    publish_parser = subparsers.add_parser("publish", help="完整发布静态站点到 data/public")
+    publish_parser.set_defaults(func=publish_site)
+
+    vendor_parser = subparsers.add_parser("vendor-assets", help="下载前端依赖到 src/static/vendor")
+    vendor_parser.set_defaults(func=vendor_assets)
+
+    args = parser.parse_args()
+    asyncio.run(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
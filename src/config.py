@@ -2,4 +2,88 @@ ALLOW_EVERYONE_REGISTER = False
 
 SECRET_KEY = "supersecretkey"
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 60
\ No newline at end of file
+ACCESS_TOKEN_EXPIRE_MINUTES = 60
+
+# 已验证 token 缓存
+TOKEN_CACHE_SIZE = 1024
+TOKEN_CACHE_TTL = 300.0
+
+# 密码哈希线程池
+PASSWORD_HASH_WORKERS = 4
+PASSWORD_HASH_QUEUE_TIMEOUT = 10.0
+
+# 结构化日志持久化
+LOG_STORE_RETENTION_DAYS = 14
+LOG_STORE_BATCH_SIZE = 256
+LOG_STORE_FLUSH_INTERVAL = 1.0
+
+# 流水线指标，METRICS_PUBLIC 为 True 时 /metrics 无需登录即可访问
+METRICS_ENABLED = True
+METRICS_PUBLIC = False
+
+# 文章优先级队列
+PRIORITY_QUEUE_SIZE = 200
+PRIORITY_AGING_PER_MINUTE = 0.05
+FETCH_CONCURRENCY = 8
+# RSS 新条目缓冲区大小，满时暂停拉取
+RSS_QUEUE_SIZE = 100
+# 来源 -> 额外加分
+PRIORITY_SOURCE_WEIGHTS: dict[str, float] = {}
+PRIORITY_POSITIVE_KEYWORDS = (
+    "志愿", "坚守", "创新", "科研", "航天", "非遗", "传承", "乡村振兴", "环保", "生态",
+    "奋斗", "榜样", "公益", "突破", "责任", "匠心", "青年", "教育",
+)
+PRIORITY_NEGATIVE_KEYWORDS = (
+    "股市", "股价", "汇率", "车祸", "通报", "天气", "气温", "招标", "拍卖", "涉嫌",
+)
+
+# 本地预过滤分类器，模型不存在时不生效（python src/cli.py train-prefilter 训练）
+PREFILTER_ENABLED = True
+PREFILTER_THRESHOLD = 0.9
+PREFILTER_AUDIT_RATE = 0.05
+
+# 流式输出：例文超过该长度时提前结束生成（要求 300-400 字，留出余量）
+LLM_MAX_EXAMPLE_CHARS = 1200
+# JSON 输出无法解析且本地修复失败时的重试次数
+LLM_JSON_RETRIES = 1
+# 每日 LLM 预算，模型 -> {"requests": 请求数, "tokens": token 数}，未配置或为 0 表示不限制
+LLM_DAILY_BUDGET: dict[str, dict[str, int]] = {
+    "gemini-2.5-flash": {"requests": 2000, "tokens": 6_000_000},
+    "gemini-2.5-flash-lite": {"requests": 4000, "tokens": 4_000_000},
+}
+# 每日费用上限（美元），0 表示不限制
+LLM_DAILY_COST_LIMIT = 0.0
+# 模型 -> (每百万输入 token 价格, 每百万输出 token 价格)，单位美元
+LLM_PRICES: dict[str, tuple[float, float]] = {
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+}
+# 用量达到预算的该比例时开始降级
+BUDGET_REDUCED_RATIO = 0.8
+BUDGET_CRITICAL_RATIO = 0.95
+# 所有 LLM 请求共用的限速（每秒最多请求数），0 表示不限制
+LLM_RATE_LIMIT = 0.0
+
+# 文章网页快照（data/snapshots），新鲜度窗口内直接读取本地快照而不重新下载
+SNAPSHOT_ENABLED = True
+SNAPSHOT_MAX_AGE = 7 * 24 * 3600
+
+# 静态站点发布（data/public），首次使用先运行 python src/cli.py publish 完整发布，
+# 之后保存、删除素材时增量更新
+PUBLISH_ENABLED = False
+PUBLISH_PAGE_SIZE = 50
+PUBLISH_FEED_SIZE = 50
+# 合并该秒数内的保存与删除后再增量更新
+PUBLISH_DEBOUNCE = 2.0
+# feed 中链接使用的站点地址，如 https://example.com
+PUBLISH_BASE_URL = ""
+
+# 请求耗时超过该秒数时记录慢请求日志
+SLOW_REQUEST_THRESHOLD = 1.0
+# 事件循环延迟采样间隔；事件循环被阻塞超过阈值时记录阻塞处的调用栈
+LOOP_MONITOR_ENABLED = True
+LOOP_LAG_INTERVAL = 0.1
+LOOP_BLOCK_THRESHOLD = 0.25
+# 采样分析器（/metrics/profile）的采样间隔与最长采样时间
+PROFILE_SAMPLE_INTERVAL = 0.005
+PROFILE_MAX_SECONDS = 120
@@ -0,0 +1,176 @@
+import asyncio
+import datetime
+import hashlib
+import json
+import zipfile
+from pathlib import Path
+from typing import AsyncIterable, AsyncIterator, NamedTuple, Optional
+
+# 每批读取的文件数，文件读取在线程中进行
+READ_BATCH_SIZE = 200
+
+# 流式 ZIP 中每个条目的固定开销：本地文件头(30) + 数据描述符(16) + 中央目录项(46)，另加两次文件名
+_ZIP_ENTRY_OVERHEAD = 30 + 16 + 46
+_ZIP_END_RECORD = 22
+
+
+class ExportRow(NamedTuple):
+    id: str
+    date: str
+    path: str
+    title: Optional[str]
+    themes: Optional[str]
+    created_at: Optional[datetime.datetime]
+
+
+class ExportEntry(NamedTuple):
+    row: ExportRow
+    size: int
+
+
+class _Sink:
+    """
+    zipfile 的输出目标，只支持追加写入，写入的数据由生成器分块取走
+    """
+
+    def __init__(self):
+        self.chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _read_files(root: Path, rows: list[ExportRow]) -> list[Optional[bytes]]:
+    result = []
+    for row in rows:
+        try:
+            result.append((root / row.path).read_bytes())
+        except OSError:
+            result.append(None)
+    return result
+
+
+def _stat_files(root: Path, rows: list[ExportRow]) -> list[Optional[int]]:
+    result = []
+    for row in rows:
+        try:
+            result.append((root / row.path).stat().st_size)
+        except OSError:
+            result.append(None)
+    return result
+
+
+async def _batched(rows: AsyncIterable[ExportRow]) -> AsyncIterator[list[ExportRow]]:
+    batch = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= READ_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _zip_name(row: ExportRow) -> str:
+    return row.path.replace("\\", "/")
+
+
+def _zip_info(row: ExportRow, size: int) -> zipfile.ZipInfo:
+    created = row.created_at or datetime.datetime(1980, 1, 1)
+    # 固定时间与权限，保证相同数据生成的压缩包逐字节一致，以支持断点续传
+    info = zipfile.ZipInfo(_zip_name(row), date_time=created.timetuple()[:6])
+    info.compress_type = zipfile.ZIP_STORED
+    info.external_attr = 0o644 << 16
+    info.file_size = size
+    return info
+
+
+async def snapshot(rows: AsyncIterable[ExportRow], root: Path) -> list[ExportEntry]:
+    """
+    读取一次素材列表与文件大小，计算长度、ETag 与输出压缩包都使用同一份快照，
+    避免生成器在两次查询之间保存或删除素材导致声明的长度与实际内容不一致
+    """
+    entries = []
+    async for batch in _batched(rows):
+        sizes = await asyncio.to_thread(_stat_files, root, batch)
+        entries.extend(ExportEntry(row, size) for row, size in zip(batch, sizes) if size is not None)
+    return entries
+
+
+def zip_length(entries: list[ExportEntry]) -> tuple[int, str]:
+    """
+    计算流式 ZIP 的总长度与内容校验值（用作 ETag）。
+    条目不压缩，长度只取决于文件名与文件大小。
+    """
+    total = _ZIP_END_RECORD
+    digest = hashlib.sha1()
+    for row, size in entries:
+        name = _zip_name(row).encode("utf-8")
+        total += _ZIP_ENTRY_OVERHEAD + 2 * len(name) + size
+        digest.update(f"{row.id}:{size}:{row.created_at}\n".encode())
+    return total, digest.hexdigest()
+
+
+async def stream_zip(entries: list[ExportEntry], root: Path) -> AsyncIterator[bytes]:
+    """
+    逐个读取快照中的素材文件并输出 ZIP 数据块，内存中最多只保留一批文件。
+    文件在快照之后被删除或修改时中断输出，而不是输出与声明长度不符的压缩包
+    """
+    sink = _Sink()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED) as zf:
+        for i in range(0, len(entries), READ_BATCH_SIZE):
+            batch = entries[i:i + READ_BATCH_SIZE]
+            contents = await asyncio.to_thread(_read_files, root, [entry.row for entry in batch])
+            for (row, size), data in zip(batch, contents):
+                if data is None or len(data) != size:
+                    raise OSError(f"素材文件在导出过程中被删除或修改: {row.path}")
+                with zf.open(_zip_info(row, size), "w") as f:
+                    f.write(data)
+            yield sink.drain()
+    yield sink.drain()
+
+
+async def stream_jsonl(rows: AsyncIterable[ExportRow], root: Path) -> AsyncIterator[bytes]:
+    """
+    每行输出一个素材的 JSON，包含元数据与 Markdown 内容
+    """
+    async for batch in _batched(rows):
+        contents = await asyncio.to_thread(_read_files, root, batch)
+        lines = []
+        for row, data in zip(batch, contents):
+            if data is None:
+                continue
+            lines.append(json.dumps({
+                "id": row.id,
+                "date": row.date,
+                "title": row.title,
+                "themes": row.themes,
+                "content": data.decode("utf-8"),
+            }, ensure_ascii=False))
+        if lines:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+async def slice_stream(chunks: AsyncIterable[bytes], start: int, end: Optional[int]) -> AsyncIterator[bytes]:
+    """
+    只输出 [start, end] 范围内的字节，用于 HTTP Range 请求
+    """
+    pos = 0
+    async for chunk in chunks:
+        chunk_end = pos + len(chunk)
+        if chunk_end > start and (end is None or pos <= end):
+            lo = max(start - pos, 0)
+            hi = len(chunk) if end is None else min(end - pos + 1, len(chunk))
+            yield chunk[lo:hi]
+        pos = chunk_end
+        if end is not None and pos > end:
+            break
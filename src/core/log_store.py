@@ -0,0 +1,166 @@
+import datetime
+import json
+import logging
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from config import LOG_STORE_BATCH_SIZE, LOG_STORE_FLUSH_INTERVAL, LOG_STORE_RETENTION_DAYS
+from db.db import data_path
+
+logs_path = data_path / "logs"
+
+# 写入结构化日志时从 LogRecord 中读取的额外字段，通过 logger.info(..., extra={...}) 传入
+STRUCTURED_FIELDS = ("article", "stage", "duration")
+
+
+class StructuredLogHandler(logging.Handler):
+    """
+    将日志以 JSON lines 形式持久化到 data/logs/YYYY-MM-DD.jsonl。
+    emit 只把记录放入队列，格式化与写盘都在后台线程中批量完成。
+    """
+
+    def __init__(
+            self,
+            path: Path = logs_path,
+            retention_days: int = LOG_STORE_RETENTION_DAYS,
+            batch_size: int = LOG_STORE_BATCH_SIZE,
+            flush_interval: float = LOG_STORE_FLUSH_INTERVAL
+    ):
+        super().__init__()
+        self.path = path
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: queue.SimpleQueue[Optional[logging.LogRecord]] = queue.SimpleQueue()
+        self.thread: Optional[threading.Thread] = None
+        self.current_day: Optional[str] = None
+
+    def emit(self, record: logging.LogRecord):
+        if self.thread is None:
+            self.start()
+        self.queue.put_nowait(record)
+
+    def start(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.thread = threading.Thread(target=self._run, name="log-store", daemon=True)
+        self.thread.start()
+
+    def close(self):
+        if self.thread is not None:
+            self.queue.put_nowait(None)
+            self.thread.join(timeout=5)
+            self.thread = None
+        super().close()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    record = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if record is None:
+                    stopping = True
+                    break
+                batch.append(record)
+            if batch:
+                try:
+                    self._write(batch)
+                except OSError:
+                    # 避免日志写入失败影响主流程
+                    pass
+
+    def _write(self, records: list[logging.LogRecord]):
+        lines: dict[str, list[str]] = {}
+        for record in records:
+            ts = datetime.datetime.fromtimestamp(record.created)
+            entry = {
+                "ts": ts.isoformat(timespec="milliseconds"),
+                "level": record.levelname,
+                "logger": record.name,
+                "message": record.getMessage(),
+            }
+            for field in STRUCTURED_FIELDS:
+                value = getattr(record, field, None)
+                if value is not None:
+                    entry[field] = value
+            day = ts.strftime("%Y-%m-%d")
+            lines.setdefault(day, []).append(json.dumps(entry, ensure_ascii=False))
+
+        for day, day_lines in lines.items():
+            with (self.path / f"{day}.jsonl").open("a", encoding="utf-8") as f:
+                f.write("\n".join(day_lines) + "\n")
+            if day != self.current_day:
+                self.current_day = day
+                self._cleanup()
+
+    def _cleanup(self):
+        # 按天轮转，删除超过保留天数的文件
+        cutoff = (datetime.date.today() - datetime.timedelta(days=self.retention_days)).strftime("%Y-%m-%d")
+        for file in self.path.glob("*.jsonl"):
+            if file.stem < cutoff:
+                file.unlink(missing_ok=True)
+
+
+def _local_naive(value: Optional[datetime.datetime]) -> Optional[datetime.datetime]:
+    # 日志记录的是本地时间（不带时区），带时区的查询时间先转换为本地时间
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
+
+
+def query_logs(
+        stage: Optional[str] = None,
+        level: Optional[str] = None,
+        article: Optional[str] = None,
+        start: Optional[datetime.datetime] = None,
+        end: Optional[datetime.datetime] = None,
+        limit: int = 200,
+        path: Path = logs_path
+) -> list[dict]:
+    """
+    按条件查询持久化日志，返回最新的 limit 条（按时间倒序）。
+    同步读取文件，应在线程中调用。
+    """
+    start, end = _local_naive(start), _local_naive(end)
+    start_key = start.isoformat(timespec="milliseconds") if start else None
+    end_key = end.isoformat(timespec="milliseconds") if end else None
+    level = level.upper() if level else None
+
+    results = []
+    for file in sorted(path.glob("*.jsonl"), reverse=True):
+        # 通过文件名跳过范围外的日期
+        if start and file.stem < start.strftime("%Y-%m-%d"):
+            break
+        if end and file.stem > end.strftime("%Y-%m-%d"):
+            continue
+        with file.open(encoding="utf-8") as f:
+            lines = f.readlines()
+        for line in reversed(lines):
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if stage and entry.get("stage") != stage:
+                continue
+            if level and entry.get("level") != level:
+                continue
+            if article and entry.get("article") != article:
+                continue
+            if start_key and entry["ts"] < start_key:
+                continue
+            if end_key and entry["ts"] > end_key:
+                continue
+            results.append(entry)
+            if len(results) >= limit:
+                return results
+    return results
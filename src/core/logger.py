@@ -1,24 +1,54 @@
 import asyncio
 import datetime
+import heapq
 import logging
+import threading
+import uuid
 from collections import deque
 from typing import Optional
 
+from core.log_store import StructuredLogHandler
+
 
 class LogItem:
-    def __init__(self, timestamp: datetime.datetime, level: int, message: str):
+    def __init__(self, timestamp: datetime.datetime, level: int, message: str, seq: int = 0):
         self.timestamp = timestamp
         self.level = level
         self.message = message
+        # 单调递增的序号，同时作为 SSE 的事件 id
+        self.seq = seq
 
     def __lt__(self, other):
-        return self.timestamp < other.timestamp
+        return self.seq < other.seq
+
+
+class LogSubscriber:
+    """
+    SSE 订阅者，持有环形缓冲区中的读取游标。
+    读取速度跟不上时，被覆盖的日志会以 "skipped N lines" 标记代替。
+    """
+
+    def __init__(self, handler: "SSELoggingHandler", cursor: int, resumed: bool = False):
+        self.handler = handler
+        self.cursor = cursor
+        # 是否从客户端上次收到的位置继续，否则需要先发送历史日志
+        self.resumed = resumed
+        self.event = asyncio.Event()
+        self.loop = asyncio.get_running_loop()
+
+    async def get(self) -> list[LogItem]:
+        while True:
+            self.event.clear()
+            items, self.cursor = self.handler.read_from(self.cursor)
+            if items:
+                return items
+            await self.event.wait()
 
 
 class SSELoggingHandler(logging.Handler):
     """
     Logging handler that:
-    1. Sends log messages via SSE.
+    1. Sends log messages via SSE through a bounded ring buffer.
     2. Keeps separate history per log level with different max sizes.
     3. Returns merged history in chronological order.
     """
@@ -27,7 +57,8 @@ class SSELoggingHandler(logging.Handler):
             self,
             info_lines: Optional[int] = 100,
             warn_lines: Optional[int] = 50,
-            error_lines: Optional[int] = 50
+            error_lines: Optional[int] = 50,
+            ring_size: int = 1024
     ):
         super().__init__()
         # 每个级别的历史日志
@@ -36,44 +67,98 @@ class SSELoggingHandler(logging.Handler):
             logging.WARNING: deque(maxlen=warn_lines),
             logging.ERROR: deque(maxlen=error_lines),
         }
-        self.subscribers: list[asyncio.Queue] = []
+        # 广播用的环形缓冲区，next_seq 为下一条日志的序号
+        self.ring: list[Optional[LogItem]] = [None] * ring_size
+        self.next_seq = 0
+        self.ring_lock = threading.Lock()
+        self.subscribers: list[LogSubscriber] = []
+        # 序号在每次启动时从 0 开始，事件 id 带上启动标识以识别重启前的 Last-Event-ID
+        self.epoch = uuid.uuid4().hex[:8]
 
     def emit(self, record: logging.LogRecord):
         msg = self.format(record)
-        item = LogItem(timestamp=datetime.datetime.now(), level=record.levelno, message=msg)
-        if record.levelno in self.history:
-            self.history[record.levelno].append(item)
-        # 异步广播给订阅者
-        asyncio.create_task(self._broadcast(msg))
-
-    async def _broadcast(self, message: str):
-        for queue in self.subscribers:
-            await queue.put(message)
-
-    def subscribe(self) -> asyncio.Queue:
-        queue = asyncio.Queue()
-        self.subscribers.append(queue)
-        return queue
-
-    def unsubscribe(self, queue: asyncio.Queue):
-        if queue in self.subscribers:
-            self.subscribers.remove(queue)
-
-    def get_history(self) -> list[str]:
-        # 合并所有级别的日志
-        all_items = []
-        for q in self.history.values():
-            all_items.extend(q)
-        # 按时间排序
-        all_items.sort()
-        # 返回消息列表
-        return [item.message for item in all_items]
+        with self.ring_lock:
+            item = LogItem(
+                timestamp=datetime.datetime.now(),
+                level=record.levelno,
+                message=msg,
+                seq=self.next_seq
+            )
+            if record.levelno in self.history:
+                self.history[record.levelno].append(item)
+            self.ring[self.next_seq % len(self.ring)] = item
+            self.next_seq += 1
+            subscribers = list(self.subscribers)
+        # 唤醒订阅者，可在任意线程中调用
+        loops = {sub.loop for sub in subscribers}
+        for loop in loops:
+            try:
+                loop.call_soon_threadsafe(self._wake, loop)
+            except RuntimeError:
+                # 事件循环已关闭
+                pass
+
+    def _wake(self, loop: asyncio.AbstractEventLoop):
+        for sub in self.subscribers:
+            if sub.loop is loop:
+                sub.event.set()
+
+    def read_from(self, cursor: int) -> tuple[list[LogItem], int]:
+        """
+        读取从 cursor 开始的所有日志，返回日志列表与新的游标。
+        """
+        with self.ring_lock:
+            end = self.next_seq
+            oldest = max(0, end - len(self.ring))
+            items = []
+            if cursor < oldest:
+                items.append(LogItem(
+                    timestamp=datetime.datetime.now(),
+                    level=logging.WARNING,
+                    message=f"... skipped {oldest - cursor} lines ...",
+                    seq=oldest - 1
+                ))
+                cursor = oldest
+            for seq in range(cursor, end):
+                items.append(self.ring[seq % len(self.ring)])
+        return items, end
+
+    def subscribe(self, last_seq: Optional[int] = None) -> LogSubscriber:
+        """
+        订阅新日志。指定 last_seq 时从其之后开始读取，用于断线重连；
+        last_seq 超出当前序号（来自重启前）时视为未知，由调用方重新发送历史日志。
+        早于环形缓冲区的部分由 read_from 以 "skipped" 标记代替。
+        """
+        with self.ring_lock:
+            resumed = last_seq is not None and 0 <= last_seq < self.next_seq
+            cursor = last_seq + 1 if resumed else self.next_seq
+            sub = LogSubscriber(self, cursor, resumed)
+            self.subscribers.append(sub)
+        return sub
+
+    def unsubscribe(self, sub: LogSubscriber):
+        with self.ring_lock:
+            if sub in self.subscribers:
+                self.subscribers.remove(sub)
+
+    def get_history(self, before: Optional[int] = None) -> list[LogItem]:
+        """
+        返回序号小于 before 的历史日志，按序号排列。
+        """
+        with self.ring_lock:
+            queues = [list(q) for q in self.history.values()]
+        # 每个级别内部已按序号有序，多路归并即可
+        items = heapq.merge(*queues)
+        if before is None:
+            return list(items)
+        return [item for item in items if item.seq < before]
 
 
 sse_handler = SSELoggingHandler()
+store_handler = StructuredLogHandler()
 
 logging.basicConfig(
     level=logging.INFO,
     format="[%(asctime)s] %(levelname)s: %(message)s",
-    handlers=[logging.StreamHandler(), sse_handler]
+    handlers=[logging.StreamHandler(), sse_handler, store_handler]
 )
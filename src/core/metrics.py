@@ -0,0 +1,295 @@
+import bisect
+import contextlib
+import threading
+import time
+from typing import Iterator, Optional
+
+from config import METRICS_ENABLED
+
+# 默认的延迟分桶（秒），LLM 阶段可能长达数分钟
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+LabelValues = tuple[str, ...]
+
+
+class Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(label, "")) for label in self.labels)
+
+    def _format_labels(self, values: LabelValues, extra: Optional[dict[str, str]] = None) -> str:
+        pairs = list(zip(self.labels, values))
+        if extra:
+            pairs.extend(extra.items())
+        if not pairs:
+            return ""
+        inner = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+        return "{" + inner + "}"
+
+    def render(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+
+
+class Counter(Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        self.values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self.lock:
+            for key, value in self.values.items():
+                lines.append(f"{self.name}{self._format_labels(key)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+
+class Histogram(Metric):
+    type_name = "histogram"
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labels: tuple[str, ...] = (),
+            buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = buckets
+        # 每组标签: [各分桶计数..., 溢出计数], 总和
+        self.counts: dict[LabelValues, list[int]] = {}
+        self.sums: dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            counts = self.counts.get(key)
+            if counts is None:
+                counts = self.counts[key] = [0] * (len(self.buckets) + 1)
+                self.sums[key] = 0.0
+            counts[index] += 1
+            self.sums[key] += value
+
+    def quantile(self, q: float, **labels: str) -> Optional[float]:
+        """
+        根据分桶估算分位数，返回所在分桶的上界
+        """
+        key = self._key(labels)
+        with self.lock:
+            counts = list(self.counts.get(key, ()))
+        total = sum(counts)
+        if not total:
+            return None
+        target = q * total
+        acc = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            acc += count
+            if acc >= target:
+                return bound
+        return float("inf")
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self.lock:
+            for key, counts in self.counts.items():
+                acc = 0
+                for bound, count in zip(self.buckets, counts):
+                    acc += count
+                    lines.append(f"{self.name}_bucket{self._format_labels(key, {'le': str(bound)})} {acc}")
+                acc += counts[-1]
+                lines.append(f"{self.name}_bucket{self._format_labels(key, {'le': '+Inf'})} {acc}")
+                lines.append(f"{self.name}_sum{self._format_labels(key)} {self.sums[key]}")
+                lines.append(f"{self.name}_count{self._format_labels(key)} {acc}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+registry: list[Metric] = []
+
+
+def register(metric: Metric) -> Metric:
+    registry.append(metric)
+    return metric
+
+
+def render() -> str:
+    lines = []
+    for metric in registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --------------------
+# 生成流水线指标
+# --------------------
+PIPELINE_STAGES = ("rss_poll", "fetch", "filter", "llm_filter", "gen_material", "gen_example", "save")
+
+stage_total = register(Counter(
+    "materialgen_stage_total", "Number of pipeline stage executions", ("stage", "outcome")
+))
+stage_seconds = register(Histogram(
+    "materialgen_stage_seconds", "Pipeline stage latency in seconds", ("stage",)
+))
+stage_in_flight = register(Gauge(
+    "materialgen_stage_in_flight", "Pipeline stage executions currently running", ("stage",)
+))
+items_total = register(Counter(
+    "materialgen_items_total", "News items processed by the generator, by result", ("result",)
+))
+llm_calls_total = register(Counter(
+    "materialgen_llm_calls_total", "LLM calls", ("model", "kind")
+))
+llm_tokens_total = register(Counter(
+    "materialgen_llm_tokens_total", "LLM tokens", ("model", "direction")
+))
+material_llm_calls = register(Histogram(
+    "materialgen_material_llm_calls", "LLM calls per accepted material", buckets=(4, 6, 8, 10, 13, 16, 20)
+))
+material_tokens = register(Histogram(
+    "materialgen_material_tokens", "LLM tokens per accepted material",
+    buckets=(5000, 10000, 20000, 40000, 80000, 160000)
+))
+queue_size = register(Gauge(
+    "materialgen_queue_size", "Fetched articles waiting for LLM processing"
+))
+prefilter_decisions_total = register(Counter(
+    "materialgen_prefilter_decisions_total", "Local pre-filter decisions", ("decision",)
+))
+prefilter_audit_total = register(Counter(
+    "materialgen_prefilter_audit_total", "Pre-filter decisions checked against the LLM", ("result",)
+))
+score_total = register(Counter(
+    "materialgen_score_total", "Example paragraph scoring results", ("result",)
+))
+snapshot_requests_total = register(Counter(
+    "materialgen_snapshot_requests_total", "Article page requests served from local snapshots", ("result",)
+))
+llm_early_stops_total = register(Counter(
+    "materialgen_llm_early_stops_total", "Streamed LLM responses stopped before the model finished", ("kind", "reason")
+))
+llm_json_repairs_total = register(Counter(
+    "materialgen_llm_json_repairs_total", "Malformed LLM JSON outputs", ("kind", "result")
+))
+
+# --------------------
+# Web 服务指标
+# --------------------
+http_requests_total = register(Counter(
+    "materialgen_http_requests_total", "HTTP requests", ("route", "method", "status")
+))
+http_request_seconds = register(Histogram(
+    "materialgen_http_request_seconds", "HTTP request latency in seconds", ("route", "method")
+))
+http_db_seconds = register(Histogram(
+    "materialgen_http_db_seconds", "Database time per HTTP request in seconds", ("route",)
+))
+event_loop_lag_seconds = register(Histogram(
+    "materialgen_event_loop_lag_seconds", "Event loop scheduling delay in seconds",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+))
+event_loop_blocked_total = register(Counter(
+    "materialgen_event_loop_blocked_total", "Times the event loop was blocked longer than the threshold"
+))
+
+
+@contextlib.contextmanager
+def track_stage(stage: str) -> Iterator[None]:
+    """
+    记录一个流水线阶段的执行次数、耗时与并发数
+    """
+    if not METRICS_ENABLED:
+        yield
+        return
+    stage_in_flight.inc(stage=stage)
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        stage_in_flight.dec(stage=stage)
+        stage_seconds.observe(time.perf_counter() - start, stage=stage)
+        stage_total.inc(stage=stage, outcome=outcome)
+
+
+def summary() -> dict:
+    """
+    管理页面使用的指标摘要
+    """
+    stages = []
+    for stage in PIPELINE_STAGES:
+        key = (stage,)
+        with stage_seconds.lock:
+            count = sum(stage_seconds.counts.get(key, ()))
+            total = stage_seconds.sums.get(key, 0.0)
+        stages.append({
+            "stage": stage,
+            "count": count,
+            "errors": stage_total.values.get((stage, "error"), 0),
+            "in_flight": stage_in_flight.values.get(key, 0),
+            "avg": total / count if count else None,
+            "p50": _finite(stage_seconds.quantile(0.5, stage=stage)),
+            "p99": _finite(stage_seconds.quantile(0.99, stage=stage)),
+        })
+    tokens: dict[str, float] = {}
+    with llm_tokens_total.lock:
+        for (_, direction), value in llm_tokens_total.values.items():
+            tokens[direction] = tokens.get(direction, 0) + value
+    return {
+        "enabled": METRICS_ENABLED,
+        "stages": stages,
+        "items": {key[0]: value for key, value in items_total.values.items()},
+        "llm_calls": sum(llm_calls_total.values.values()),
+        "llm_tokens": tokens,
+        "prefilter": {
+            **{key[0]: value for key, value in prefilter_decisions_total.values.items()},
+            **{f"audit_{key[0]}": value for key, value in prefilter_audit_total.values.items()},
+        },
+    }
+
+
+def _finite(value: Optional[float]) -> Optional[float]:
+    # JSON 不支持 inf，超出最大分桶时返回 None
+    if value is None or value == float("inf"):
+        return None
+    return value
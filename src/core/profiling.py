@@ -0,0 +1,126 @@
+"""
+事件循环监控与采样分析器。
+
+LoopMonitor 在事件循环中周期性休眠，用实际唤醒时间与预期的差值衡量调度延迟；
+另有一个看门狗线程检查事件循环的心跳，超过 LOOP_BLOCK_THRESHOLD 没有心跳时
+记录事件循环线程当前的调用栈，即正在阻塞事件循环的回调。
+
+sample() 在指定时间内定时抓取所有线程的调用栈，输出 flamegraph.pl / speedscope
+可直接读取的折叠栈格式（每行 "线程;函数;函数 次数"）。
+"""
+import asyncio
+import functools
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+from config import LOOP_BLOCK_THRESHOLD, LOOP_LAG_INTERVAL, LOOP_MONITOR_ENABLED, PROFILE_SAMPLE_INTERVAL
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+src_path = Path(__file__).parent.parent
+
+
+class LoopMonitor:
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, threshold: float = LOOP_BLOCK_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self.heartbeat = time.perf_counter()
+        self.loop_thread: Optional[int] = None
+        self.task: Optional[asyncio.Task] = None
+        self.stop_event = threading.Event()
+
+    async def _probe(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.heartbeat = time.perf_counter()
+            metrics.event_loop_lag_seconds.observe(max(0.0, self.heartbeat - start - self.interval))
+
+    def _watchdog(self):
+        reported = None
+        while not self.stop_event.wait(self.threshold / 2):
+            heartbeat = self.heartbeat
+            blocked = time.perf_counter() - heartbeat - self.interval
+            # 每次阻塞只记录一次
+            if blocked < self.threshold or reported == heartbeat:
+                continue
+            reported = heartbeat
+            frame = sys._current_frames().get(self.loop_thread)
+            if frame is None:
+                continue
+            metrics.event_loop_blocked_total.inc()
+            stack = "".join(traceback.format_stack(frame))
+            logger.warning(f"事件循环已阻塞 {blocked * 1000:.0f}ms，当前调用栈:\n{stack}")
+
+    def start(self):
+        if not LOOP_MONITOR_ENABLED or self.task is not None:
+            return
+        self.loop_thread = threading.get_ident()
+        self.heartbeat = time.perf_counter()
+        self.stop_event.clear()
+        self.task = asyncio.create_task(self._probe())
+        threading.Thread(target=self._watchdog, name="loop-watchdog", daemon=True).start()
+
+    def stop(self):
+        if self.task is None:
+            return
+        self.task.cancel()
+        self.task = None
+        self.stop_event.set()
+
+
+loop_monitor = LoopMonitor()
+
+_profile_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=4096)
+def _frame_name(code) -> str:
+    path = Path(code.co_filename)
+    if path.is_relative_to(src_path):
+        filename = str(path.relative_to(src_path))
+    elif "site-packages" in path.parts:
+        filename = "/".join(path.parts[path.parts.index("site-packages") + 1:])
+    else:
+        filename = path.name
+    # 折叠栈格式用分号分隔帧
+    return f"{code.co_qualname} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _collapse(frame) -> list[str]:
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    names.reverse()
+    return names
+
+
+def sample(seconds: float, interval: float = PROFILE_SAMPLE_INTERVAL) -> Optional[str]:
+    """
+    采样所有线程 seconds 秒，返回折叠栈文本。已有采样在进行时返回 None
+    """
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    try:
+        own = threading.get_ident()
+        stacks: Counter[str] = Counter()
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                thread = names.get(ident, str(ident)).replace(";", ":")
+                stacks[";".join([thread, *_collapse(frame)])] += 1
+            time.sleep(interval)
+    finally:
+        _profile_lock.release()
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
@@ -0,0 +1,415 @@
+"""
+静态站点发布。
+
+把素材页面、列表页与 JSON feed 渲染为静态文件，由普通静态文件服务器提供读取，
+FastAPI 只需处理管理与生成。目录结构与动态路由一致:
+
+    view/index.html                 最新一页列表
+    view/page/<n>/index.html        第 n 页列表（按创建时间从旧到新分页，新增素材只影响最后一页）
+    view/<id>/index.html            素材页面
+    api/materials/<id>.json         素材内容
+    feed.json                       最新素材的 JSON Feed
+    static/                         带内容哈希的静态资源
+
+data/public 是指向当前版本目录的符号链接。完整发布在新目录中生成后原子地切换链接；
+保存或删除素材时只重新渲染受影响的文件，每个文件都先写临时文件再替换。
+增量更新合并 PUBLISH_DEBOUNCE 秒内的保存与删除后在后台执行，保存素材时只查询最后一页与 feed 范围内的记录。
+素材页面中写入的相似素材记录在 related.json 中，删除或重新生成素材时据此重新渲染引用它的页面，
+新素材的相似素材页面也会重新渲染，使其出现在这些页面的相似素材列表中。
+"""
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from math import ceil
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import func, select
+
+from config import PUBLISH_BASE_URL, PUBLISH_DEBOUNCE, PUBLISH_ENABLED, PUBLISH_FEED_SIZE, PUBLISH_PAGE_SIZE
+from core import related, static
+from core.template import env
+from db.db import AsyncSessionLocal, data_path, files_path
+from db.models import Markdown
+
+logger = logging.getLogger(__name__)
+
+public_path = data_path / "public"
+builds_path = data_path / "public-builds"
+# 记录每个列表页内容的签名，用于判断哪些页需要重新渲染
+PAGES_FILE = "pages.json"
+# 记录每个素材页面中写入的相似素材 id
+RELATED_FILE = "related.json"
+
+_lock = asyncio.Lock()
+# 等待增量更新的素材 id
+_pending_saved: set[str] = set()
+_pending_deleted: set[str] = set()
+_flush_task: Optional[asyncio.Task] = None
+# 正在执行的增量更新，flush 需要等待它完成而不是取消
+_applying: Optional[asyncio.Task] = None
+
+
+def _write(path: Path, content: str | bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    if isinstance(content, str):
+        tmp_path.write_text(content, encoding="utf-8")
+    else:
+        tmp_path.write_bytes(content)
+    os.replace(tmp_path, path)
+
+
+def _remove(path: Path):
+    try:
+        if path.is_symlink():
+            path.unlink()
+        elif path.is_dir():
+            shutil.rmtree(path)
+        else:
+            path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+_ROW_COLUMNS = (Markdown.id, Markdown.title, Markdown.date, Markdown.path, Markdown.created_at)
+
+
+async def _list_rows() -> list:
+    async with AsyncSessionLocal() as session:
+        stmt = select(*_ROW_COLUMNS).order_by(Markdown.created_at, Markdown.id)
+        return list((await session.execute(stmt)).all())
+
+
+async def _rows_by_id(md_ids: set[str]) -> dict:
+    if not md_ids:
+        return {}
+    async with AsyncSessionLocal() as session:
+        # noinspection PyTypeChecker
+        stmt = select(*_ROW_COLUMNS).where(Markdown.id.in_(md_ids))
+        return {row.id: row for row in (await session.execute(stmt)).all()}
+
+
+async def _tail_rows() -> tuple[int, list, list]:
+    """
+    返回总页数、最后一页的记录与 feed 范围内的记录，均按创建时间从旧到新排列
+    """
+    async with AsyncSessionLocal() as session:
+        total = (await session.execute(select(func.count(Markdown.id)))).scalar_one()
+        total_pages = max(1, ceil(total / PUBLISH_PAGE_SIZE))
+        stmt = select(*_ROW_COLUMNS).order_by(Markdown.created_at, Markdown.id) \
+            .offset((total_pages - 1) * PUBLISH_PAGE_SIZE).limit(PUBLISH_PAGE_SIZE)
+        tail = list((await session.execute(stmt)).all())
+        stmt = select(*_ROW_COLUMNS).order_by(Markdown.created_at.desc(), Markdown.id.desc()).limit(PUBLISH_FEED_SIZE)
+        feed = list((await session.execute(stmt)).all())[::-1]
+    return total_pages, tail, feed
+
+
+def _read_material(row) -> Optional[str]:
+    try:
+        return (files_path / row.path).read_text(encoding="utf-8")
+    except OSError:
+        return None
+
+
+def _load_related(root: Path) -> dict[str, list[str]]:
+    try:
+        return json.loads((root / RELATED_FILE).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _related_items(md_id: str, by_id: dict) -> list[dict]:
+    if not related.enabled():
+        return []
+    similar = related.index.similar(md_id, 5) or []
+    return [
+        {"id": i, "title": by_id[i].title, "date": by_id[i].date}
+        for i, _ in similar if i in by_id
+    ]
+
+
+def _render_material(root: Path, row, by_id: dict) -> Optional[list[str]]:
+    """
+    渲染素材页面与 JSON，返回页面中写入的相似素材 id，素材文件不存在时返回 None
+    """
+    from gen.post_processing import parse_markdown
+
+    content = _read_material(row)
+    if content is None:
+        return None
+    # 静态页面无法调用相似素材接口，发布时直接写入
+    related_items = _related_items(row.id, by_id)
+    html = env.get_template("view/view_md.html").render(
+        md_id=row.id, title=row.title, content=content, related_items=related_items
+    )
+    _write(root / "view" / row.id / "index.html", html)
+    item = {
+        "id": row.id,
+        "title": row.title,
+        "date": row.date,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        **(parse_markdown(content) or {}),
+        "content": content,
+    }
+    _write(root / "api" / "materials" / f"{row.id}.json", json.dumps(item, ensure_ascii=False))
+    return [i["id"] for i in related_items]
+
+
+def _page_items(rows: list) -> list[list[dict]]:
+    items = [{"id": r.id, "title": r.title, "date": r.date} for r in rows]
+    pages = [items[i:i + PUBLISH_PAGE_SIZE] for i in range(0, len(items), PUBLISH_PAGE_SIZE)]
+    return pages or [[]]
+
+
+def _signature(items: list[dict], total_pages: int) -> str:
+    raw = json.dumps([items, total_pages], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _load_signatures(root: Path) -> dict[str, str]:
+    try:
+        return json.loads((root / PAGES_FILE).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _render_page(root: Path, number: int, items: list[dict], total: int):
+    html = env.get_template("publish/list.html").render(items=list(reversed(items)), page=number, total_pages=total)
+    _write(root / "view" / "page" / str(number) / "index.html", html)
+    if number == total:
+        _write(root / "view" / "index.html", html)
+
+
+def _render_pages(root: Path, rows: list, force: bool = False) -> int:
+    """
+    重新渲染内容有变化的列表页，返回渲染的页数
+    """
+    pages = _page_items(rows)
+    total = len(pages)
+    old = _load_signatures(root)
+    signatures = {}
+    rendered = 0
+    for number, items in enumerate(pages, 1):
+        signature = _signature(items, total)
+        signatures[str(number)] = signature
+        if not force and old.get(str(number)) == signature:
+            continue
+        _render_page(root, number, items, total)
+        rendered += 1
+    # 删除素材后多余的页
+    for number in old:
+        if number not in signatures:
+            _remove(root / "view" / "page" / number)
+    _write(root / PAGES_FILE, json.dumps(signatures))
+    return rendered
+
+
+def _render_tail(root: Path, tail: list, total_pages: int):
+    """
+    只检查最后一页，用于页数不变且没有删除的情况
+    """
+    signatures = _load_signatures(root)
+    items = _page_items(tail)[0]
+    signature = _signature(items, total_pages)
+    if signatures.get(str(total_pages)) == signature:
+        return
+    _render_page(root, total_pages, items, total_pages)
+    signatures[str(total_pages)] = signature
+    _write(root / PAGES_FILE, json.dumps(signatures))
+
+
+def _render_feed(root: Path, rows: list):
+    latest = rows[-PUBLISH_FEED_SIZE:][::-1]
+    feed = {
+        "version": "https://jsonfeed.org/version/1.1",
+        "title": "素材",
+        "home_page_url": f"{PUBLISH_BASE_URL}/view/",
+        "feed_url": f"{PUBLISH_BASE_URL}/feed.json",
+        "items": [
+            {
+                "id": row.id,
+                "url": f"{PUBLISH_BASE_URL}/view/{row.id}/",
+                "title": row.title,
+                "date_published": (row.created_at or datetime.datetime.fromisoformat(row.date))
+                .replace(tzinfo=datetime.timezone.utc).isoformat(),
+            }
+            for row in latest
+        ],
+    }
+    _write(root / "feed.json", json.dumps(feed, ensure_ascii=False))
+
+
+def _copy_static(root: Path):
+    for path, hashed in static.manifest.items():
+        target = root / "static" / hashed
+        if not target.exists():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(static.static_path / path, target)
+
+
+def _build(rows: list) -> Path:
+    builds_path.mkdir(parents=True, exist_ok=True)
+    # 目录名唯一，同一秒内再次发布也不会覆盖当前正在使用的版本
+    root = Path(tempfile.mkdtemp(prefix=time.strftime("%Y%m%d-%H%M%S-"), dir=builds_path))
+    root.chmod(0o755)
+    by_id = {row.id: row for row in rows}
+    baked = {}
+    for row in rows:
+        if (related_ids := _render_material(root, row, by_id)) is not None:
+            baked[row.id] = related_ids
+    _write(root / RELATED_FILE, json.dumps(baked))
+    _render_pages(root, rows, force=True)
+    _render_feed(root, rows)
+    _copy_static(root)
+    return root
+
+
+def _swap(root: Path):
+    """
+    原子地把 data/public 指向新目录，并删除旧版本
+    """
+    if public_path.exists() and not public_path.is_symlink():
+        raise RuntimeError(f"{public_path} 不是符号链接，请先移走")
+    link = public_path.with_name(".public.tmp")
+    _remove(link)
+    link.symlink_to(root.relative_to(public_path.parent), target_is_directory=True)
+    os.replace(link, public_path)
+    for build in builds_path.iterdir():
+        if build != root:
+            _remove(build)
+
+
+async def publish_all() -> tuple[Path, int]:
+    """
+    完整发布所有素材，返回新版本目录与素材数
+    """
+    async with _lock:
+        rows = await _list_rows()
+        root = await asyncio.to_thread(_build, rows)
+        await asyncio.to_thread(_swap, root)
+    logger.info("静态站点已发布: %d 条素材", len(rows))
+    return root, len(rows)
+
+
+def _current_root() -> Optional[Path]:
+    if not PUBLISH_ENABLED or not public_path.is_symlink():
+        return None
+    return public_path.resolve()
+
+
+def _update(root: Path, by_id: dict, rendered: set[str], deleted: set[str],
+            rows: Optional[list], tail: tuple[int, list, list]):
+    total_pages, tail_rows, feed_rows = tail
+    baked = _load_related(root)
+    for md_id in rendered:
+        if md_id in by_id and (related_ids := _render_material(root, by_id[md_id], by_id)) is not None:
+            baked[md_id] = related_ids
+    for md_id in deleted:
+        _remove(root / "view" / md_id)
+        _remove(root / "api" / "materials" / f"{md_id}.json")
+        baked.pop(md_id, None)
+    _write(root / RELATED_FILE, json.dumps(baked))
+    if rows is not None:
+        _render_pages(root, rows)
+    else:
+        _render_tail(root, tail_rows, total_pages)
+    _render_feed(root, feed_rows)
+    _copy_static(root)
+
+
+async def _apply(saved: set[str], deleted: set[str]):
+    if (root := _current_root()) is None:
+        return
+    async with _lock:
+        # 页面中写入了被删除或重新生成的素材的页面，以及新素材的相似素材页面，都需要重新渲染
+        changed = saved | deleted
+        baked = await asyncio.to_thread(_load_related, root)
+        rendered = {md_id for md_id, related_ids in baked.items() if changed.intersection(related_ids)}
+        similar = {md_id: await related.similar(md_id, 5) or [] for md_id in saved}
+        for items in similar.values():
+            rendered.update(i for i, _ in items)
+        rendered = (rendered - deleted) | saved
+        # 素材页面中的相似素材需要标题，一并查询
+        ids = set(rendered)
+        for md_id in rendered:
+            items = similar[md_id] if md_id in similar else await related.similar(md_id, 5) or []
+            ids.update(i for i, _ in items)
+        by_id = await _rows_by_id(ids)
+        tail = await _tail_rows()
+        # 删除、页数变化或修改了之前页中的素材（重新生成）时才读取全部记录
+        signatures = await asyncio.to_thread(_load_signatures, root)
+        full = deleted or len(signatures) != tail[0] or not saved <= {row.id for row in tail[1]}
+        rows = await _list_rows() if full else None
+        await asyncio.to_thread(_update, root, by_id, rendered, deleted, rows, tail)
+
+
+def _take_pending() -> tuple[set[str], set[str]]:
+    saved, deleted = set(_pending_saved), set(_pending_deleted)
+    _pending_saved.clear()
+    _pending_deleted.clear()
+    return saved, deleted
+
+
+async def _apply_pending():
+    saved, deleted = _take_pending()
+    if not saved and not deleted:
+        return
+    try:
+        await _apply(saved, deleted)
+    except Exception as e:
+        logger.error("静态站点更新失败: %s", e)
+
+
+async def _debounced_flush():
+    global _flush_task, _applying
+    while True:
+        await asyncio.sleep(PUBLISH_DEBOUNCE)
+        if not _pending_saved and not _pending_deleted:
+            _flush_task = None
+            return
+        # 在线程中写文件的更新不能中途取消，否则锁释放后可能有两个更新同时写同一批临时文件
+        _applying = asyncio.create_task(_apply_pending())
+        try:
+            await asyncio.shield(_applying)
+        finally:
+            _applying = None
+
+
+async def flush():
+    """
+    立即执行等待中的增量更新，用于退出前。正在执行的更新会等待其完成
+    """
+    global _flush_task
+    task, _flush_task = _flush_task, None
+    applying = _applying
+    if task is not None and not task.done():
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    if applying is not None:
+        await applying
+    await _apply_pending()
+
+
+async def update(saved: Optional[list[str]] = None, deleted: Optional[list[str]] = None):
+    """
+    素材保存或删除后增量更新已发布的站点，未启用或尚未完整发布过时不做任何事。
+    更新在后台合并执行，不阻塞调用方
+    """
+    global _flush_task
+    if _current_root() is None:
+        return
+    _pending_deleted.update(deleted or [])
+    _pending_saved.difference_update(deleted or [])
+    _pending_saved.update(md_id for md_id in saved or [] if md_id not in _pending_deleted)
+    if _flush_task is None:
+        _flush_task = asyncio.create_task(_debounced_flush())
@@ -0,0 +1,290 @@
+"""
+相似素材索引。
+
+用素材标题、简介和主题的字符 n-gram 哈希向量（带符号哈希，L2 归一化）表示素材，
+向量保存在内存映射的矩阵 data/related/vectors.f32 中，ids.txt 按行号顺序追加每行对应的素材 id。
+保存素材时追加或覆盖一行，删除时清零该行，查询时用矩阵乘法计算余弦相似度。
+"""
+import asyncio
+import contextlib
+import logging
+import os
+import threading
+import uuid
+import zlib
+from pathlib import Path
+from typing import Optional
+
+from db.db import data_path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+related_path = data_path / "related"
+
+DIM = 256
+NGRAM_SIZES = (1, 2)
+MIN_CAPACITY = 1024
+
+# 各字段的权重
+FIELD_WEIGHTS = (("title", 2.0), ("summary", 1.0))
+THEME_WEIGHT = 3.0
+
+
+def _lock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        return
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            # LK_LOCK 重试 10 秒后仍失败时继续等待
+            continue
+
+
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def embed(title: str, summary: str, themes: str) -> "np.ndarray":
+    indices: list[int] = []
+    weights: list[float] = []
+
+    def add(token: str, weight: float):
+        h = zlib.crc32(token.encode("utf-8"))
+        indices.append(h % DIM)
+        # 最高位决定符号，减少哈希冲突带来的偏差
+        weights.append(-weight if h & 0x80000000 else weight)
+
+    for (field, weight), content in zip(FIELD_WEIGHTS, (title or "", summary or "")):
+        for n in NGRAM_SIZES:
+            for i in range(len(content) - n + 1):
+                add(f"{field}:{content[i:i + n]}", weight)
+    for theme in (themes or "").replace("，", ",").split(","):
+        if theme := theme.strip():
+            add(f"theme:{theme}", THEME_WEIGHT)
+
+    if not indices:
+        return np.zeros(DIM, dtype=np.float32)
+    vector = np.bincount(indices, weights, minlength=DIM).astype(np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class RelatedIndex:
+    """
+    服务进程与 CLI（batch、regenerate、related-index）可能同时写入索引，
+    写入与读取都持有 data/related/.lock 文件锁，并在分配行号前读取其他进程追加到 ids.txt 的内容
+    """
+
+    def __init__(self, path: Path = related_path):
+        self.path = path
+        self.vectors_path = path / "vectors.f32"
+        self.ids_path = path / "ids.txt"
+        self.lock_path = path / ".lock"
+        self.lock = threading.Lock()
+        self.lock_file = None
+        self.ids: list[Optional[str]] = []
+        self.rows: dict[str, int] = {}
+        self.matrix: Optional[np.ndarray] = None
+        # 已读取的 ids.txt 位置与首行的版本标识，用于增量读取与发现其他进程重建了索引
+        self.ids_offset = 0
+        self.generation: Optional[str] = None
+
+    @property
+    def capacity(self) -> int:
+        return 0 if self.matrix is None else self.matrix.shape[0]
+
+    @contextlib.contextmanager
+    def _locked(self):
+        with self.lock:
+            if self.lock_file is None:
+                self.path.mkdir(parents=True, exist_ok=True)
+                self.lock_file = self.lock_path.open("a+b")
+            _lock_file(self.lock_file)
+            try:
+                yield
+            finally:
+                _unlock_file(self.lock_file)
+
+    def _close(self):
+        if self.matrix is not None:
+            self.matrix.flush()
+            del self.matrix
+        self.matrix = None
+
+    def _open(self, capacity: int):
+        self._close()
+        with self.vectors_path.open("ab") as f:
+            # 只扩大不缩小，其他进程可能已经扩容
+            size = max(f.seek(0, os.SEEK_END), capacity * DIM * 4)
+            f.truncate(size)
+        self.matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(size // (DIM * 4), DIM))
+
+    def _apply_line(self, line: str):
+        if line.startswith("#"):
+            return
+        if line.startswith("-"):
+            if (row := self.rows.pop(line[1:], None)) is not None:
+                self.ids[row] = None
+        elif line:
+            self.rows[line] = len(self.ids)
+            self.ids.append(line)
+
+    def _sync(self):
+        """
+        读取 ids.txt 中尚未读取的部分，文件被重建时重新加载，需持有文件锁
+        """
+        try:
+            with self.ids_path.open("rb") as f:
+                first = f.readline()
+                size = f.seek(0, os.SEEK_END)
+            # 旧版本的 ids.txt 没有版本行
+            generation = first.strip().decode("utf-8") if first.startswith(b"#") else ""
+        except FileNotFoundError:
+            size, generation = 0, None
+        if generation != self.generation or size < self.ids_offset:
+            self._close()
+            self.ids, self.rows = [], {}
+            self.ids_offset, self.generation = 0, generation
+        if size > self.ids_offset:
+            with self.ids_path.open("rb") as f:
+                f.seek(self.ids_offset)
+                data = f.read()
+            # 只处理完整的行
+            data = data[:data.rfind(b"\n") + 1]
+            for line in data.decode("utf-8").splitlines():
+                self._apply_line(line)
+            self.ids_offset += len(data)
+        # 其他进程扩容后行数超出当前映射时重新映射
+        if self.matrix is None or len(self.ids) > self.capacity:
+            self._open(max(len(self.ids), MIN_CAPACITY))
+
+    def load(self):
+        with self._locked():
+            self._sync()
+
+    def _append_ids(self, lines: list[str]):
+        if self.generation is None:
+            # 新建的 ids.txt 以版本行开头
+            self.generation = f"#{uuid.uuid4().hex}"
+            lines = [self.generation, *lines]
+        data = "".join(line + "\n" for line in lines).encode("utf-8")
+        with self.ids_path.open("ab") as f:
+            f.write(data)
+        self.ids_offset += len(data)
+
+    def add(self, items: list[tuple[str, str, str, str]]):
+        """
+        添加或更新素材向量，items 为 (id, 标题, 简介, 主题)
+        """
+        vectors = [embed(title, summary, themes) for _, title, summary, themes in items]
+        with self._locked():
+            self._sync()
+            new_ids = []
+            for (md_id, *_), vector in zip(items, vectors):
+                row = self.rows.get(md_id)
+                if row is None:
+                    row = len(self.ids)
+                    if row >= self.capacity:
+                        self._open(max(self.capacity * 2, MIN_CAPACITY))
+                    self.rows[md_id] = row
+                    self.ids.append(md_id)
+                    new_ids.append(md_id)
+                self.matrix[row] = vector
+            self.matrix.flush()
+            if new_ids:
+                self._append_ids(new_ids)
+
+    def remove(self, md_ids: list[str]):
+        with self._locked():
+            self._sync()
+            removed = []
+            for md_id in md_ids:
+                if (row := self.rows.pop(md_id, None)) is not None:
+                    self.ids[row] = None
+                    self.matrix[row] = 0
+                    removed.append(f"-{md_id}")
+            if removed:
+                self.matrix.flush()
+                self._append_ids(removed)
+
+    def similar(self, md_id: str, k: int = 10) -> Optional[list[tuple[str, float]]]:
+        """
+        返回与素材最相似的 k 个素材及其余弦相似度，素材不在索引中时返回 None
+        """
+        with self._locked():
+            self._sync()
+            row = self.rows.get(md_id)
+            if row is None:
+                return None
+            count = len(self.ids)
+            scores = self.matrix[:count] @ self.matrix[row]
+            scores[row] = -1
+            k = min(k, count - 1)
+            if k <= 0:
+                return []
+            top = np.argpartition(scores, -k)[-k:]
+            top = top[np.argsort(scores[top])[::-1]]
+            return [(self.ids[i], float(scores[i])) for i in top if self.ids[i] is not None and scores[i] > 0]
+
+    def rebuild(self, items: list[tuple[str, str, str, str]]):
+        """
+        丢弃现有索引并按 items 重建，用于首次建立索引或清理已删除的行。
+        其他进程在下次读写时发现 ids.txt 已被替换，重新加载
+        """
+        with self._locked():
+            self._close()
+            self.vectors_path.unlink(missing_ok=True)
+            self.ids_path.unlink(missing_ok=True)
+            self.ids, self.rows = [], {}
+            self.ids_offset, self.generation = 0, None
+        self.add(items)
+
+
+index = RelatedIndex()
+
+
+def enabled() -> bool:
+    return np is not None
+
+
+async def add(md_id: str, title: str, summary: str, themes: str):
+    if not enabled():
+        return
+    try:
+        await asyncio.to_thread(index.add, [(md_id, title, summary, themes)])
+    except OSError as e:
+        logger.error("相似素材索引更新失败 %s: %s", md_id, e)
+
+
+async def remove(md_ids: list[str]):
+    if not enabled() or not md_ids:
+        return
+    try:
+        await asyncio.to_thread(index.remove, md_ids)
+    except OSError as e:
+        logger.error("相似素材索引更新失败: %s", e)
+
+
+async def similar(md_id: str, k: int = 10) -> Optional[list[tuple[str, float]]]:
+    if not enabled():
+        return None
+    return await asyncio.to_thread(index.similar, md_id, k)
@@ -0,0 +1,88 @@
+import hashlib
+import pathlib
+import urllib.request
+from typing import Optional
+
+from starlette.exceptions import HTTPException
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+static_path = pathlib.Path(__file__).parent.parent / "static"
+vendor_path = static_path / "vendor"
+
+# 第三方前端资源，运行 `python src/cli.py vendor-assets` 下载到 static/vendor，
+# 未下载时页面回退到 CDN 地址
+VENDOR_ASSETS = {
+    "vendor/tailwind.js": "https://cdn.tailwindcss.com",
+    "vendor/marked.min.js": "https://cdn.jsdelivr.net/npm/marked/marked.min.js",
+    "vendor/github-markdown-light.css": "https://cdn.jsdelivr.net/npm/github-markdown-css/github-markdown-light.css",
+}
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# 逻辑路径 -> 带内容哈希的路径，以及反向映射
+manifest: dict[str, str] = {}
+hashed_files: dict[str, str] = {}
+
+
+def _hashed_name(path: str, digest: str) -> str:
+    parent, _, name = path.rpartition("/")
+    stem, dot, suffix = name.rpartition(".")
+    hashed = f"{stem}.{digest}.{suffix}" if dot else f"{name}.{digest}"
+    return f"{parent}/{hashed}" if parent else hashed
+
+
+def build_manifest():
+    manifest.clear()
+    hashed_files.clear()
+    if not static_path.exists():
+        return
+    for file in static_path.rglob("*"):
+        if not file.is_file() or file.name.startswith("."):
+            continue
+        path = file.relative_to(static_path).as_posix()
+        digest = hashlib.sha256(file.read_bytes()).hexdigest()[:12]
+        hashed = _hashed_name(path, digest)
+        manifest[path] = hashed
+        hashed_files[hashed] = path
+
+
+def static_url(path: str) -> str:
+    """
+    模板中使用的静态资源地址，文件名中带内容哈希，可长期缓存
+    """
+    hashed = manifest.get(path)
+    if hashed:
+        return f"/static/{hashed}"
+    return VENDOR_ASSETS.get(path, f"/static/{path}")
+
+
+def download_vendor_assets() -> list[str]:
+    vendor_path.mkdir(parents=True, exist_ok=True)
+    downloaded = []
+    for path, url in VENDOR_ASSETS.items():
+        request = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
+        with urllib.request.urlopen(request, timeout=30) as resp:
+            (static_path / path).write_bytes(resp.read())
+        downloaded.append(path)
+    build_manifest()
+    return downloaded
+
+
+class HashedStaticFiles(StaticFiles):
+    """
+    只提供带内容哈希的文件名，响应附带 immutable 缓存头
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        real_path: Optional[str] = hashed_files.get(path.replace("\\", "/"))
+        if real_path is None:
+            raise HTTPException(status_code=404)
+        response = await super().get_response(real_path, scope)
+        if response.status_code in (200, 304):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+
+build_manifest()
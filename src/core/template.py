@@ -1,5 +1,29 @@
 import pathlib
 
+import jinja2
 from starlette.templating import Jinja2Templates
 
-templates = Jinja2Templates(directory=pathlib.Path(__file__).parent.parent / "templates")
+from core.static import static_url
+from db.db import data_path
+
+templates_path = pathlib.Path(__file__).parent.parent / "templates"
+bytecode_cache_path = data_path / "cache" / "templates"
+bytecode_cache_path.mkdir(parents=True, exist_ok=True)
+
+# 编译后的模板字节码缓存到磁盘，重启后无需重新编译
+env = jinja2.Environment(
+    loader=jinja2.FileSystemLoader(templates_path),
+    autoescape=True,
+    bytecode_cache=jinja2.FileSystemBytecodeCache(str(bytecode_cache_path)),
+)
+env.globals["static_url"] = static_url
+
+templates = Jinja2Templates(env=env)
+
+
+def precompile_templates():
+    """
+    启动时预先编译所有模板，避免首次请求时编译
+    """
+    for name in env.list_templates(extensions=["html"]):
+        env.get_template(name)
@@ -1,11 +1,22 @@
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 import datetime
+import threading
+import time
 from typing import Optional
 
-from fastapi import Cookie, Depends, HTTPException
-from jose import jwt, JWTError
+from fastapi import Cookie, Depends, HTTPException, Request
 from passlib.context import CryptContext
 
+# 优先使用 PyJWT，解码速度比 python-jose 快，不可用时回退
+try:
+    import jwt
+    from jwt import InvalidTokenError as JWTError
+except ImportError:
+    from jose import jwt, JWTError
+
 from fastapi.security import OAuth2PasswordBearer
 
 from config import *
@@ -22,6 +33,37 @@ def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 
+# --------------------
+# 密码哈希线程池
+# --------------------
+# bcrypt 每次计算需要数百毫秒 CPU，放到线程池中执行，避免阻塞事件循环
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="pwd-hash")
+_hash_semaphore: Optional[asyncio.Semaphore] = None
+
+
+async def _run_in_hash_pool(func, *args):
+    global _hash_semaphore
+    if _hash_semaphore is None:
+        _hash_semaphore = asyncio.Semaphore(PASSWORD_HASH_WORKERS)
+    try:
+        await asyncio.wait_for(_hash_semaphore.acquire(), timeout=PASSWORD_HASH_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Server busy, please retry later")
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_semaphore.release()
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_hash_pool(hash_password, password)
+
+
+async def verify_password_async(plain_password, hashed_password) -> bool:
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+
 # --------------------
 # JWT
 # --------------------
@@ -35,8 +77,61 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def get_current_user(token: Optional[str] = Cookie(None)):
+# --------------------
+# 已验证 token 缓存
+# --------------------
+# token -> (用户信息, 过期时间戳)，过期时间取 token 的 exp 与缓存 TTL 中较早者
+_token_cache: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+# 依赖函数是同步的，FastAPI 在线程池中并发执行，缓存的读写都需要加锁
+_token_cache_lock = threading.Lock()
+
+auth_stats = {
+    "calls": 0,
+    "cache_hits": 0,
+    "total_seconds": 0.0,
+}
+
+
+def _decode_token(token: str) -> Optional[dict]:
+    now = time.time()
+    with _token_cache_lock:
+        cached = _token_cache.get(token)
+        if cached is not None:
+            user, expires_at = cached
+            if expires_at > now:
+                _token_cache.move_to_end(token)
+                auth_stats["cache_hits"] += 1
+                return user
+            del _token_cache[token]
+
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    username: str = payload.get("sub")
+    role: str = payload.get("role")
+    if not username or not role:
+        return None
+    user = {"username": username, "role": role}
+
+    expires_at = now + TOKEN_CACHE_TTL
+    if isinstance(payload.get("exp"), (int, float)):
+        expires_at = min(expires_at, payload["exp"])
+    with _token_cache_lock:
+        _token_cache[token] = (user, expires_at)
+        if len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+    return user
+
+
+def get_current_user(request: Request, token: Optional[str] = Cookie(None)):
+    start = time.perf_counter()
     user = get_current_user_by_default(token)
+    elapsed = time.perf_counter() - start
+    with _token_cache_lock:
+        auth_stats["calls"] += 1
+        auth_stats["total_seconds"] += elapsed
+    request.state.auth_time = elapsed
     if user is None:
         raise HTTPException(status_code=401, detail="Invalid token")
     return user
@@ -45,15 +140,9 @@ def get_current_user(token: Optional[str] = Cookie(None)):
 def get_current_user_by_default(token: Optional[str] = Cookie(None)):
     if not token:
         return None
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        role: str = payload.get("role")
-        if not username or not role:
-            return None
-        return {"username": username, "role": role}
-    except JWTError:
-        return None
+    user = _decode_token(token)
+    # 返回副本，调用方可能会修改
+    return dict(user) if user else None
 
 
 def require_role(required_role: UserRole):
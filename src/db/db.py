@@ -1,10 +1,13 @@
+import os
 import pathlib
 
+from sqlalchemy import inspect, text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 
-data_path = pathlib.Path(__file__).parent.parent.parent / "data"
+# MATERIALGEN_DATA 可指定其他数据目录，用于基准测试等需要隔离数据的场景
+data_path = pathlib.Path(os.environ.get("MATERIALGEN_DATA") or pathlib.Path(__file__).parent.parent.parent / "data")
 if not data_path.exists():
     data_path.mkdir(exist_ok=True)
 
@@ -22,19 +25,47 @@ Base = declarative_base()
 AsyncSessionLocal = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
 
+def _add_missing_columns(conn) -> list[tuple[str, str]]:
+    """
+    create_all 不会修改已存在的表，这里为旧数据库补上新增的列与索引，返回新增的 (表名, 列名)
+    """
+    inspector = inspect(conn)
+    added = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=conn.dialect)
+            conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+            added.append((table.name, column.name))
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(conn)
+    return added
+
+
 async def init_db():
     from .models import User, UserRole
     async with engine.begin() as conn:
+        added = await conn.run_sync(_add_missing_columns)
         await conn.run_sync(Base.metadata.create_all)
 
+    if {("markdowns", "themes"), ("markdowns", "source")} & set(added):
+        from gen.post_processing import backfill_material_fields
+        await backfill_material_fields()
+
     async with AsyncSessionLocal() as session:
         result = await session.execute(User.__table__.select().where(User.username=="admin"))
         admin_user = result.fetchone()
         if not admin_user:
-            from core.user import hash_password
+            from core.user import hash_password_async
             new_admin = User(
                 username="admin",
-                password=hash_password("THEPassword"),
+                password=await hash_password_async("THEPassword"),
                 role=UserRole.Admin.value
             )
             session.add(new_admin)
@@ -13,12 +13,18 @@ class Markdown(Base):
     date = Column(String, nullable=False)
     path = Column(String, nullable=False)
     title = Column(String)
+    themes = Column(String)
+    source = Column(String)
+    # 生成时使用的提示词版本，见 gen.llm_parse.PROMPT_VERSION
+    prompt_version = Column(String)
     created_at = Column(TIMESTAMP, default=lambda: datetime.datetime.now(datetime.timezone.utc))
 
     # 索引
     __table_args__ = (
         Index("idx_date", "date"),
         Index("idx_title", "title"),
+        Index("idx_source", "source"),
+        Index("idx_prompt_version", "prompt_version"),
     )
 
 
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import os
+from pathlib import Path
+from typing import Iterable
+
+from sqlalchemy import delete, select
+
+from .db import AsyncSessionLocal, files_path
+from .models import Markdown
+
+logger = logging.getLogger(__name__)
+
+REMOVE_BATCH_SIZE = 500
+
+
+def _unlink_all(paths: list[str]) -> int:
+    removed = 0
+    for path in paths:
+        try:
+            (files_path / path).unlink()
+            removed += 1
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("文件删除失败 %s: %s", path, e)
+    return removed
+
+
+async def remove_files(paths: Iterable[str]):
+    """
+    分批在线程中删除素材文件，供后台任务调用
+    """
+    paths = list(paths)
+    removed = 0
+    for i in range(0, len(paths), REMOVE_BATCH_SIZE):
+        removed += await asyncio.to_thread(_unlink_all, paths[i:i + REMOVE_BATCH_SIZE])
+    if paths:
+        logger.info("已删除%d个素材文件", removed)
+
+
+def scan_files(root: Path = files_path) -> set[str]:
+    """
+    递归列出 root 下所有 md 文件的相对路径，格式与数据库中的 path 一致
+    """
+    result = set()
+    stack = [str(root)]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(".md"):
+                    result.add(os.path.relpath(entry.path, root))
+    return result
+
+
+async def reconcile(delete_orphans: bool = False, prune_missing: bool = False) -> dict:
+    """
+    对比 data/files 与 markdowns 表:
+    orphans 为磁盘上存在但数据库中没有记录的文件，missing 为数据库中存在但文件丢失的记录
+    """
+    files = await asyncio.to_thread(scan_files)
+    db_paths: dict[str, str] = {}
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(select(Markdown.path, Markdown.id).execution_options(yield_per=1000))
+        async for path, md_id in result:
+            db_paths[path] = md_id
+
+        orphans = sorted(files - db_paths.keys())
+        missing = sorted(db_paths.keys() - files)
+
+        if prune_missing and missing:
+            ids = [db_paths[path] for path in missing]
+            for i in range(0, len(ids), REMOVE_BATCH_SIZE):
+                # noinspection PyTypeChecker
+                await session.execute(delete(Markdown).where(Markdown.id.in_(ids[i:i + REMOVE_BATCH_SIZE])))
+            await session.commit()
+
+    if delete_orphans and orphans:
+        await remove_files(orphans)
+
+    return {
+        "files": len(files),
+        "records": len(db_paths),
+        "orphans": orphans,
+        "missing": missing,
+    }
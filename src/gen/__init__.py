@@ -1,39 +1,177 @@
 import asyncio
+import dataclasses
+import importlib
 import logging
-from typing import AsyncIterable, Optional
+import time
+from typing import TYPE_CHECKING, AsyncIterable, Optional
 
-from gen import llm_parse, news, post_processing
+from config import FETCH_CONCURRENCY, PRIORITY_QUEUE_SIZE
+from core import metrics
+from gen import budget, news, post_processing, priority, rss
+
+if TYPE_CHECKING:
+    from gen import llm_parse
 
 rss_gen: Optional[AsyncIterable] = None
 logger = logging.getLogger(__name__)
 
 
+async def load_llm():
+    """
+    延迟加载 LLM 模块（langchain、grpc 及模型客户端），在线程中导入以免阻塞事件循环。
+    仅在首次启动生成器时真正导入。
+    """
+    global llm_parse
+    if "llm_parse" not in globals():
+        logger.info("正在加载LLM模块")
+        llm_parse = await asyncio.to_thread(importlib.import_module, "gen.llm_parse")
+    return llm_parse
+
+
+def stage_extra(link: str, stage: str, start: Optional[float] = None) -> dict:
+    """
+    生成结构化日志的 extra 字段，start 为该阶段开始时的 time.perf_counter()
+    """
+    extra = {"article": link, "stage": stage}
+    if start is not None:
+        extra["duration"] = round(time.perf_counter() - start, 3)
+    return extra
+
+
+@dataclasses.dataclass
+class PendingArticle:
+    """
+    已抓取并通过本地过滤、等待 LLM 处理的文章
+    """
+    link: str
+    summary: str
+    article: news.Article
+    score: float
+
+
+async def prepare_item(item: rss.RSSResult) -> Optional[PendingArticle]:
+    """
+    抓取文章并进行本地过滤，返回待处理的文章，未通过时返回 None
+    """
+    link = item.link
+    logger.info("新新闻: %s", item.title, extra=stage_extra(link, "rss"))
+
+    start = time.perf_counter()
+    with metrics.track_stage("fetch"):
+        article = await news.parse_article(item.feed_url, link)
+    if not article:
+        metrics.items_total.inc(result="fetch_failed")
+        logger.warning("文章抓取失败: %s", link, extra=stage_extra(link, "fetch", start))
+        return None
+    logger.info("文章抓取完成: %s", article.title if article else "失败", extra=stage_extra(link, "fetch", start))
+    if not (summary := item.summary):
+        metrics.items_total.inc(result="no_summary")
+        logger.warning("摘要缺失", extra=stage_extra(link, "fetch"))
+        return None
+
+    with metrics.track_stage("filter"):
+        passed = news.filter_article(article)
+    if not passed:
+        metrics.items_total.inc(result="filtered")
+        logger.info("文章未通过过滤", extra=stage_extra(link, "filter"))
+        return None
+
+    score = priority.score_article(article, item.title or "", summary, item.published)
+    return PendingArticle(link=link, summary=summary, article=article, score=score)
+
+
+async def process_article(pending: PendingArticle):
+    """
+    LLM 生成素材并保存，当天预算用完时等待到第二天
+    """
+    link, article = pending.link, pending.article
+    await budget.wait_for_budget()
+    start = time.perf_counter()
+    llm = await llm_parse.run_sequence(article.title, pending.summary, article.text)
+    if not llm.is_ok:
+        metrics.items_total.inc(result="llm_rejected")
+        logger.info("LLM处理不合格", extra=stage_extra(link, "llm", start))
+        return
+    logger.info("LLM处理完成", extra=stage_extra(link, "llm", start))
+    metrics.material_llm_calls.observe(llm.llm_calls)
+    metrics.material_tokens.observe(llm.tokens)
+
+    start = time.perf_counter()
+    with metrics.track_stage("save"):
+        await post_processing.post_process_material(llm, article)
+    metrics.items_total.inc(result="accepted")
+    logger.info("素材保存完成", extra=stage_extra(link, "save", start))
+
+
+async def fill_queue(queue: priority.PriorityQueue):
+    """
+    从 RSS 读取新条目，并发抓取后按优先级放入队列
+    """
+    semaphore = asyncio.Semaphore(FETCH_CONCURRENCY)
+    tasks: set[asyncio.Task] = set()
+
+    async def prepare(item: rss.RSSResult):
+        try:
+            pending = await prepare_item(item)
+            if pending is None:
+                return
+            dropped = queue.put(pending, pending.score)
+            metrics.queue_size.set(len(queue))
+            if dropped is not None:
+                metrics.items_total.inc(result="dropped")
+                logger.warning("队列已满，丢弃低优先级文章: %s", dropped.link, extra=stage_extra(dropped.link, "queue"))
+        except Exception as e:
+            logger.exception("文章预处理失败 %s: %s", item.link, e)
+        finally:
+            semaphore.release()
+
+    try:
+        async for item in rss_gen:
+            await semaphore.acquire()
+            task = asyncio.create_task(prepare(item))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        # RSS 结束后等待正在抓取的条目入队
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
 async def generation():
     if rss_gen is None:
         logger.error("rss not set")
         return
+    await load_llm()
+    queue = priority.PriorityQueue(PRIORITY_QUEUE_SIZE)
+    producer = asyncio.create_task(fill_queue(queue))
     try:
-        async for item in rss_gen:
-            logger.info("新新闻: %s", item["title"])
-            article = await news.parse_article(item["feed_url"], item["link"])
-            if not article:
-                logger.warning("文章抓取失败: %s", item["link"])
-                continue
-            logger.info("文章抓取完成: %s", article.title if article else "失败")
-            if not (summary := getattr(item["entry"], "summary", "")):
-                logger.warning("摘要缺失")
-                continue
-            if not news.filter_article(article):
-                logger.info("文章未通过过滤")
-                continue
-            llm = await llm_parse.run_sequence(article.title, summary, article.text)
-            if not llm.is_ok:
-                logger.info("LLM处理不合格")
-                continue
-            await post_processing.post_process_material(llm, article)
+        while True:
+            if producer.done() and not len(queue):
+                # 生产者异常退出时抛出异常，正常结束时处理完队列中剩余的文章后返回
+                producer.result()
+                logger.info("RSS 已结束，生成器退出")
+                return
+            if len(queue) or producer.done():
+                pending = await queue.get()
+            else:
+                # 同时等待队列与生产者，生产者退出时不会一直阻塞在空队列上
+                getter = asyncio.create_task(queue.get())
+                await asyncio.wait((getter, producer), return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done():
+                    getter.cancel()
+                    continue
+                pending = getter.result()
+            metrics.queue_size.set(len(queue))
+            await process_article(pending)
     except asyncio.CancelledError:
         logger.info("正在退出")
         raise
+    except Exception as e:
+        logger.exception("生成器异常退出: %s", e)
+        raise
+    finally:
+        producer.cancel()
 
 
 def set_rss_obj(rss_):
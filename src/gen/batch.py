@@ -0,0 +1,235 @@
+"""
+离线批量导入：从历史 RSS 存档、HTML 网页或 JSONL 文件读取条目，
+经过与实时生成相同的抓取、过滤、LLM 与保存阶段生成素材。
+
+支持的输入：
+- JSONL 文件，每行 {"link", "title", "summary", "published", "feed_url", "html"}，
+  只有 link 必填，提供 html 时不再下载网页
+- 目录，其中的 .xml/.rss/.atom 按 RSS 存档解析，.html/.htm 按网页解析
+  （地址取自 canonical 链接或 og:url），.jsonl 按上面的格式读取
+"""
+import asyncio
+import dataclasses
+import json
+import logging
+import pathlib
+import time
+from typing import Callable, Iterator, Optional
+
+from bs4 import BeautifulSoup
+
+from core import metrics
+from gen import news, prepare_item, process_article, load_llm
+from gen.feed_parser import parse_feed
+from gen.news import snapshots
+from gen.rss import RSSResult
+
+logger = logging.getLogger(__name__)
+
+FEED_SUFFIXES = (".xml", ".rss", ".atom")
+HTML_SUFFIXES = (".html", ".htm")
+
+
+@dataclasses.dataclass(slots=True)
+class BatchItem:
+    link: str
+    title: Optional[str] = None
+    summary: str = ""
+    published: Optional[str] = None
+    feed_url: Optional[str] = None
+    html: Optional[str] = None
+
+
+@dataclasses.dataclass
+class BatchStats:
+    total: int = 0
+    skipped: int = 0
+    done: int = 0
+    errors: int = 0
+    results: dict[str, int] = dataclasses.field(default_factory=dict)
+    llm_calls: int = 0
+    tokens: int = 0
+    started: float = dataclasses.field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def rate(self) -> float:
+        return self.done / self.elapsed if self.elapsed else 0.0
+
+
+def _items_from_jsonl(path: pathlib.Path) -> Iterator[BatchItem]:
+    with path.open(encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                yield BatchItem(**{k: v for k, v in record.items() if k in BatchItem.__slots__})
+            except (json.JSONDecodeError, TypeError) as e:
+                logger.warning("%s 第 %d 行格式错误: %s", path, line_no, e)
+
+
+def _item_from_html(path: pathlib.Path) -> Optional[BatchItem]:
+    html = path.read_text(encoding="utf-8", errors="replace")
+    soup = BeautifulSoup(html, "lxml")
+    link = None
+    if tag := soup.find("link", rel="canonical"):
+        link = tag.get("href")
+    if not link and (tag := soup.find("meta", property="og:url")):
+        link = tag.get("content")
+    if not link:
+        logger.warning("网页缺少地址，已跳过: %s", path)
+        return None
+    description = soup.find("meta", attrs={"name": "description"})
+    return BatchItem(
+        link=link,
+        title=soup.title.get_text(strip=True) if soup.title else None,
+        summary=description.get("content", "") if description else "",
+        html=html,
+    )
+
+
+def iter_items(path: pathlib.Path) -> Iterator[BatchItem]:
+    """
+    按文件名顺序逐条读取输入，不会一次性载入全部内容
+    """
+    files = [path] if path.is_file() else sorted(p for p in path.rglob("*") if p.is_file())
+    for file in files:
+        suffix = file.suffix.lower()
+        if suffix == ".jsonl":
+            yield from _items_from_jsonl(file)
+        elif suffix in FEED_SUFFIXES:
+            for entry in parse_feed(file.read_bytes()):
+                if entry.link:
+                    yield BatchItem(entry.link, entry.title, entry.summary, entry.published)
+        elif suffix in HTML_SUFFIXES:
+            if item := _item_from_html(file):
+                yield item
+
+
+class Checkpoint:
+    """
+    已处理条目的地址，逐行追加到文件，中断后重新运行时跳过
+    """
+
+    def __init__(self, path: pathlib.Path):
+        self.path = path
+        self.done: set[str] = set()
+        if path.exists():
+            self.done.update(line.strip() for line in path.read_text(encoding="utf-8").splitlines() if line.strip())
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = path.open("a", encoding="utf-8")
+
+    def __contains__(self, link: str) -> bool:
+        return link in self.done
+
+    def add(self, link: str):
+        self.done.add(link)
+        self.file.write(link + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+async def process_item(item: BatchItem, stats: BatchStats):
+    if item.feed_url is None or news.get_source(item.feed_url) is None:
+        source = news.source_for_article(item.link)
+        if source is None:
+            stats.results["no_source"] = stats.results.get("no_source", 0) + 1
+            return
+        item.feed_url = source.feed_urls[0]
+    if item.html is not None:
+        await snapshots.put(item.link, item.html)
+        item.html = None
+
+    pending = await prepare_item(RSSResult(
+        feed_url=item.feed_url,
+        title=item.title,
+        link=item.link,
+        published=item.published,
+        summary=item.summary,
+    ))
+    if pending is None:
+        return
+    await process_article(pending)
+
+
+def _item_results() -> dict[str, int]:
+    with metrics.items_total.lock:
+        return {key[0]: int(value) for key, value in metrics.items_total.values.items()}
+
+
+async def run_batch(
+        path: pathlib.Path,
+        checkpoint_path: pathlib.Path,
+        concurrency: int = 8,
+        limit: Optional[int] = None,
+        progress_interval: float = 10.0,
+        on_progress: Optional[Callable[[BatchStats], None]] = None,
+) -> BatchStats:
+    """
+    并发处理输入中的全部条目，已在检查点中的条目会被跳过。
+    存档中的网页都当作本地快照使用，不会因新鲜度过期而重新下载
+    """
+    await load_llm()
+    stats = BatchStats()
+    checkpoint = Checkpoint(checkpoint_path)
+    queue: asyncio.Queue[Optional[BatchItem]] = asyncio.Queue(maxsize=concurrency * 2)
+    before = _item_results()
+    usage_before = (sum(metrics.llm_calls_total.values.values()), sum(metrics.llm_tokens_total.values.values()))
+
+    async def produce():
+        loaded = 0
+        iterator = iter_items(path)
+        while True:
+            # 读取文件与解析存档在线程中进行
+            item = await asyncio.to_thread(next, iterator, None)
+            if item is None or (limit is not None and loaded >= limit):
+                break
+            stats.total += 1
+            if item.link in checkpoint:
+                stats.skipped += 1
+                continue
+            loaded += 1
+            await queue.put(item)
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def worker():
+        while (item := await queue.get()) is not None:
+            try:
+                await process_item(item, stats)
+            except Exception as e:
+                stats.errors += 1
+                logger.exception("处理失败 %s: %s", item.link, e)
+            else:
+                checkpoint.add(item.link)
+            stats.done += 1
+
+    def update_stats():
+        after = _item_results()
+        for key, value in after.items():
+            if value - before.get(key, 0):
+                stats.results[key] = value - before.get(key, 0)
+        stats.llm_calls = int(sum(metrics.llm_calls_total.values.values()) - usage_before[0])
+        stats.tokens = int(sum(metrics.llm_tokens_total.values.values()) - usage_before[1])
+
+    async def report():
+        while True:
+            await asyncio.sleep(progress_interval)
+            update_stats()
+            if on_progress:
+                on_progress(stats)
+
+    reporter = asyncio.create_task(report())
+    try:
+        with snapshots.offline():
+            await asyncio.gather(produce(), *(worker() for _ in range(concurrency)))
+    finally:
+        reporter.cancel()
+        checkpoint.close()
+        update_stats()
+    return stats
@@ -0,0 +1,202 @@
+"""
+LLM 每日用量预算。
+
+按模型统计当天的请求数与 token 数，持久化到 data/budget.json，重启后继续累计。
+接近上限时逐级降级（减少重写与例文、收紧预过滤），用完后推迟处理到第二天。
+"""
+import asyncio
+import datetime
+import enum
+import json
+import logging
+import threading
+import time
+from typing import Optional
+
+from config import BUDGET_CRITICAL_RATIO, BUDGET_REDUCED_RATIO, LLM_DAILY_BUDGET, LLM_DAILY_COST_LIMIT, LLM_PRICES
+from db.db import data_path
+
+logger = logging.getLogger(__name__)
+
+budget_path = data_path / "budget.json"
+
+SAVE_INTERVAL = 5.0
+
+
+class BudgetLevel(enum.IntEnum):
+    Normal = 0
+    # 跳过大部分重写，减少例文
+    Reduced = 1
+    # 不评分重写，只生成一篇例文，预过滤模型直接给出结论
+    Critical = 2
+    # 暂停处理，等待第二天
+    Exhausted = 3
+
+
+class Budget:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # 保证同一时间只有一次写文件
+        self.save_lock = threading.Lock()
+        self.saving = False
+        self.day = ""
+        # 模型 -> {"requests", "input_tokens", "output_tokens"}
+        self.usage: dict[str, dict[str, int]] = {}
+        self.dirty = False
+        self.last_save = 0.0
+        self.unknown_models: set[str] = set()
+        self.load()
+
+    @staticmethod
+    def today() -> str:
+        return datetime.date.today().isoformat()
+
+    def load(self):
+        try:
+            saved = json.loads(budget_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            saved = {}
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error("LLM 用量读取失败: %s", e)
+            saved = {}
+        if saved.get("day") == self.today():
+            self.day = saved["day"]
+            # 旧版本记录的 "models/<名称>" 合并到配置中的名称下
+            for model, counters in saved.get("models", {}).items():
+                merged = self.usage.setdefault(
+                    model.removeprefix("models/"), {"requests": 0, "input_tokens": 0, "output_tokens": 0}
+                )
+                for key in merged:
+                    merged[key] += counters.get(key, 0)
+        else:
+            self.day = self.today()
+
+    def save(self):
+        with self.save_lock:
+            with self.lock:
+                data = json.dumps({"day": self.day, "models": self.usage}, indent=2)
+                self.dirty = False
+                self.last_save = time.monotonic()
+            tmp_path = budget_path.with_suffix(".tmp")
+            tmp_path.write_text(data, encoding="utf-8")
+            tmp_path.replace(budget_path)
+
+    def _background_save(self):
+        try:
+            self.save()
+        except OSError as e:
+            logger.error("LLM 用量保存失败: %s", e)
+        finally:
+            self.saving = False
+
+    def _roll_over(self):
+        if self.day != (today := self.today()):
+            self.day = today
+            self.usage = {}
+
+    def record(self, model: str, input_tokens: int, output_tokens: int):
+        model = model.removeprefix("models/")
+        if model not in self.unknown_models and (LLM_DAILY_BUDGET or LLM_PRICES) \
+                and model not in LLM_DAILY_BUDGET and model not in LLM_PRICES:
+            # 模型名与配置不一致时用量不会计入任何限额，只提示一次
+            self.unknown_models.add(model)
+            logger.warning("模型 %s 没有配置每日预算与价格，用量不计入限额", model)
+        with self.lock:
+            self._roll_over()
+            counters = self.usage.setdefault(model, {"requests": 0, "input_tokens": 0, "output_tokens": 0})
+            counters["requests"] += 1
+            counters["input_tokens"] += input_tokens
+            counters["output_tokens"] += output_tokens
+            self.dirty = True
+            need_save = not self.saving and time.monotonic() - self.last_save >= SAVE_INTERVAL
+            if need_save:
+                self.saving = True
+        if not need_save:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._background_save()
+        else:
+            # 在事件循环中调用时在线程中写文件，不阻塞事件循环
+            loop.run_in_executor(None, self._background_save)
+
+    def flush(self):
+        if self.dirty:
+            self.save()
+
+    @staticmethod
+    def _cost(model: str, counters: dict[str, int]) -> float:
+        input_price, output_price = LLM_PRICES.get(model, (0.0, 0.0))
+        return (counters["input_tokens"] * input_price + counters["output_tokens"] * output_price) / 1_000_000
+
+    def ratio(self) -> float:
+        """
+        当天用量占预算的最大比例
+        """
+        with self.lock:
+            self._roll_over()
+            ratios = [0.0]
+            cost = 0.0
+            for model, counters in self.usage.items():
+                cost += self._cost(model, counters)
+                limits = LLM_DAILY_BUDGET.get(model, {})
+                if limits.get("requests"):
+                    ratios.append(counters["requests"] / limits["requests"])
+                if limits.get("tokens"):
+                    ratios.append((counters["input_tokens"] + counters["output_tokens"]) / limits["tokens"])
+            if LLM_DAILY_COST_LIMIT:
+                ratios.append(cost / LLM_DAILY_COST_LIMIT)
+            return max(ratios)
+
+    def level(self) -> BudgetLevel:
+        ratio = self.ratio()
+        if ratio >= 1:
+            return BudgetLevel.Exhausted
+        if ratio >= BUDGET_CRITICAL_RATIO:
+            return BudgetLevel.Critical
+        if ratio >= BUDGET_REDUCED_RATIO:
+            return BudgetLevel.Reduced
+        return BudgetLevel.Normal
+
+    def status(self) -> dict:
+        level = self.level()
+        with self.lock:
+            models = {}
+            for model, counters in self.usage.items():
+                limits = LLM_DAILY_BUDGET.get(model, {})
+                models[model] = {
+                    **counters,
+                    "cost": round(self._cost(model, counters), 4),
+                    "request_limit": limits.get("requests"),
+                    "token_limit": limits.get("tokens"),
+                }
+        return {
+            "day": self.day,
+            "level": level.name,
+            "ratio": round(self.ratio(), 4),
+            "cost": round(sum(m["cost"] for m in models.values()), 4),
+            "cost_limit": LLM_DAILY_COST_LIMIT or None,
+            "models": models,
+        }
+
+
+budget = Budget()
+
+
+def seconds_until_reset() -> float:
+    now = datetime.datetime.now()
+    tomorrow = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time())
+    return (tomorrow - now).total_seconds()
+
+
+async def wait_for_budget(check_interval: float = 600.0):
+    """
+    预算用完时等待到第二天（或配置调整后）再继续
+    """
+    logged: Optional[str] = None
+    while budget.level() == BudgetLevel.Exhausted:
+        if logged != budget.day:
+            logged = budget.day
+            logger.warning("今日 LLM 预算已用完，推迟处理，约 %.1f 小时后恢复", seconds_until_reset() / 3600)
+        await asyncio.sleep(min(check_interval, seconds_until_reset() + 1))
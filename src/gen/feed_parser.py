@@ -0,0 +1,139 @@
+"""
+RSS / Atom 快速解析。
+
+基于 lxml iterparse 流式解析，只提取流水线用到的字段，
+遇到连续已处理过的条目时提前结束；解析失败时回退到 feedparser。
+"""
+import dataclasses
+import io
+import logging
+from typing import Container, Optional
+
+import feedparser
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+logger = logging.getLogger(__name__)
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+RSS1 = "{http://purl.org/rss/1.0/}"
+RDF = "{http://www.w3.org/1999/02/22-rdf-syntax-ns#}"
+DC = "{http://purl.org/dc/elements/1.1/}"
+CONTENT = "{http://purl.org/rss/1.0/modules/content/}"
+
+ITEM_TAGS = ("item", f"{RSS1}item", f"{ATOM}entry")
+
+# 连续遇到多少个已处理的条目后停止解析。
+# 源通常按时间倒序排列，允许少量置顶或乱序的条目
+SEEN_STOP_AFTER = 3
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class FeedEntry:
+    id: str
+    title: Optional[str]
+    link: Optional[str]
+    published: Optional[str]
+    summary: str
+
+
+def _text(element, *tags: str) -> Optional[str]:
+    for tag in tags:
+        child = element.find(tag)
+        if child is not None:
+            text = "".join(child.itertext()).strip()
+            if text:
+                return text
+    return None
+
+
+def _atom_link(element) -> Optional[str]:
+    fallback = None
+    for link in element.iterfind(f"{ATOM}link"):
+        rel = link.get("rel", "alternate")
+        if rel == "alternate":
+            return link.get("href")
+        fallback = fallback or link.get("href")
+    return fallback
+
+
+def _parse_element(element) -> Optional[FeedEntry]:
+    if element.tag == f"{ATOM}entry":
+        title = _text(element, f"{ATOM}title")
+        link = _atom_link(element)
+        entry_id = _text(element, f"{ATOM}id")
+        published = _text(element, f"{ATOM}published", f"{ATOM}updated")
+        summary = _text(element, f"{ATOM}summary", f"{ATOM}content")
+    elif element.tag == f"{RSS1}item":
+        title = _text(element, f"{RSS1}title", f"{DC}title")
+        link = _text(element, f"{RSS1}link") or element.get(f"{RDF}about")
+        entry_id = element.get(f"{RDF}about")
+        published = _text(element, f"{DC}date")
+        summary = _text(element, f"{RSS1}description", f"{CONTENT}encoded")
+    else:
+        title = _text(element, "title", f"{DC}title")
+        link = _text(element, "link")
+        entry_id = _text(element, "guid")
+        published = _text(element, "pubDate", f"{DC}date")
+        summary = _text(element, "description", f"{CONTENT}encoded")
+
+    entry_id = entry_id or link or title
+    if not entry_id:
+        return None
+    return FeedEntry(id=entry_id, title=title, link=link, published=published, summary=summary or "")
+
+
+def _parse_lxml(data: bytes, seen: Container[str]) -> list[FeedEntry]:
+    entries = []
+    seen_run = 0
+    context = etree.iterparse(
+        io.BytesIO(data), events=("end",), tag=ITEM_TAGS,
+        resolve_entities=False, no_network=True, huge_tree=False,
+    )
+    for _, element in context:
+        entry = _parse_element(element)
+        # 释放已处理的节点，避免整棵树常驻内存
+        element.clear(keep_tail=False)
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+        if entry is None:
+            continue
+        if entry.id in seen:
+            seen_run += 1
+            if seen_run >= SEEN_STOP_AFTER:
+                break
+            continue
+        seen_run = 0
+        entries.append(entry)
+    return entries
+
+
+def _parse_feedparser(data: bytes, seen: Container[str]) -> list[FeedEntry]:
+    entries = []
+    for entry in feedparser.parse(data).entries:
+        entry_id = entry.get("id") or entry.get("link") or entry.get("title")
+        if not entry_id or entry_id in seen:
+            continue
+        entries.append(FeedEntry(
+            id=entry_id,
+            title=entry.get("title"),
+            link=entry.get("link"),
+            published=entry.get("published"),
+            summary=entry.get("summary", ""),
+        ))
+    return entries
+
+
+def parse_feed(data: bytes, seen: Container[str] = ()) -> list[FeedEntry]:
+    """
+    解析 RSS / Atom，按源中的顺序返回未出现在 seen 中的条目
+    """
+    if etree is not None:
+        try:
+            return _parse_lxml(data, seen)
+        except etree.XMLSyntaxError as e:
+            logger.debug("lxml 解析失败，回退到 feedparser: %s", e)
+    return _parse_feedparser(data, seen)
@@ -0,0 +1,109 @@
+import json
+import re
+from typing import Optional
+
+
+class JSONObjectScanner:
+    """
+    增量扫描 LLM 的流式输出，找到第一个完整的顶层 JSON 对象。
+    每次传入目前为止的完整文本，只扫描新增部分。
+    """
+
+    def __init__(self):
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.start: Optional[int] = None
+        self.end: Optional[int] = None
+
+    def feed(self, text: str) -> bool:
+        if self.end is not None:
+            return True
+        for i in range(self.pos, len(text)):
+            c = text[i]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif c == "\\":
+                    self.escape = True
+                elif c == '"':
+                    self.in_string = False
+            elif self.start is None:
+                if c == "{":
+                    self.start = i
+                    self.depth = 1
+            elif c == '"':
+                self.in_string = True
+            elif c == "{":
+                self.depth += 1
+            elif c == "}":
+                self.depth -= 1
+                if self.depth == 0:
+                    self.end = i + 1
+                    self.pos = self.end
+                    return True
+        self.pos = len(text)
+        return False
+
+    def object_text(self, text: str) -> Optional[str]:
+        if self.start is None or self.end is None:
+            return None
+        return text[self.start:self.end]
+
+
+_trailing_comma = re.compile(r",\s*([}\]])")
+# 换行分隔的两个成员之间缺少逗号，如 "a": "x"\n"b": "y"
+_missing_comma = re.compile(r'("|\d|true|false|null|[}\]])(\s*\n\s*)(")')
+
+
+def repair_json(text: str) -> Optional[dict]:
+    """
+    尝试修复常见的 JSON 格式错误：字符串中未转义的换行、缺少或多余的逗号、
+    输出被截断导致的未闭合字符串与括号。无法修复时返回 None
+    """
+    start = text.find("{")
+    if start < 0:
+        return None
+
+    out = []
+    stack = []
+    in_string = escape = False
+    for c in text[start:]:
+        if in_string:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+            elif c == "\n":
+                out.append("\\n")
+                continue
+            elif c == "\r":
+                continue
+        elif c == '"':
+            in_string = True
+        elif c in "{[":
+            stack.append("}" if c == "{" else "]")
+        elif c in "}]":
+            if not stack:
+                break
+            stack.pop()
+            if not stack:
+                out.append(c)
+                break
+        out.append(c)
+
+    if in_string:
+        out.append('"')
+    repaired = "".join(out).rstrip().rstrip(",")
+    repaired += "".join(reversed(stack))
+    repaired = _trailing_comma.sub(r"\1", repaired)
+    repaired = _missing_comma.sub(r"\1,\2\3", repaired)
+
+    try:
+        result = json.loads(repaired)
+    except json.JSONDecodeError:
+        return None
+    return result if isinstance(result, dict) else None
@@ -1,11 +1,23 @@
+import asyncio
+import contextvars
 import dataclasses
+import hashlib
+import time
 from typing import Optional
 import logging
 
+from langchain_core.exceptions import OutputParserException
+from langchain_core.messages.ai import add_usage
 from langchain_core.prompts import PromptTemplate
 from langchain_classic.output_parsers import ResponseSchema, StructuredOutputParser
 from langchain_google_genai import ChatGoogleGenerativeAI
 
+from config import LLM_JSON_RETRIES, LLM_MAX_EXAMPLE_CHARS, LLM_RATE_LIMIT
+from core import metrics
+from gen import prefilter
+from gen.budget import BudgetLevel, budget
+from gen.json_stream import JSONObjectScanner, repair_json
+
 
 logger = logging.getLogger(__name__)
 
@@ -135,6 +147,32 @@ rewrite_prompt = PromptTemplate(
 )
 
 
+def _prompt_hash(*prompts: PromptTemplate) -> str:
+    return hashlib.sha1("\n".join(p.template for p in prompts).encode("utf-8")).hexdigest()[:8]
+
+
+# 提示词版本，由模板内容生成，修改模板后自动变化。
+# 素材记录 "<素材提示词版本>.<例文提示词版本>"，重新生成时据此选择素材和需要重跑的阶段
+MATERIAL_PROMPT_VERSION = _prompt_hash(synthesize_prompt)
+EXAMPLE_PROMPT_VERSION = _prompt_hash(writer_prompt, score_prompt, rewrite_prompt)
+PROMPT_VERSION = f"{MATERIAL_PROMPT_VERSION}.{EXAMPLE_PROMPT_VERSION}"
+
+
+# 预算等级 -> (例文数, 每篇例文最多评分重写轮数)
+BUDGET_EXAMPLE_PLAN = {
+    BudgetLevel.Normal: (3, 3),
+    BudgetLevel.Reduced: (2, 1),
+    BudgetLevel.Critical: (1, 0),
+    BudgetLevel.Exhausted: (1, 0),
+}
+# 预算等级 -> 预过滤置信度阈值
+PREFILTER_BUDGET_THRESHOLDS = {
+    BudgetLevel.Reduced: 0.75,
+    BudgetLevel.Critical: 0.5,
+    BudgetLevel.Exhausted: 0.5,
+}
+
+
 @dataclasses.dataclass
 class LLMOutputs:
     is_ok: bool
@@ -142,6 +180,130 @@ class LLMOutputs:
     summary: Optional[str] = dataclasses.field(default=None)
     themes: Optional[str] = dataclasses.field(default=None)
     example: list[str] = dataclasses.field(default_factory=list)
+    llm_calls: int = 0
+    tokens: int = 0
+    prompt_version: Optional[str] = None
+
+
+@dataclasses.dataclass
+class LLMUsage:
+    calls: int = 0
+    tokens: int = 0
+
+
+# 当前素材累计的 LLM 用量
+_usage: contextvars.ContextVar[Optional[LLMUsage]] = contextvars.ContextVar("llm_usage", default=None)
+
+# 可在运行时修改，如重新生成任务的 --rate-limit 参数
+rate_limit = LLM_RATE_LIMIT
+_rate_lock = asyncio.Lock()
+_last_request = 0.0
+
+
+async def _wait_rate_limit():
+    """
+    所有 LLM 请求共用的限速，rate_limit 为每秒最多请求数
+    """
+    global _last_request
+    if rate_limit <= 0:
+        return
+    async with _rate_lock:
+        delay = _last_request + 1 / rate_limit - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        _last_request = time.monotonic()
+
+
+def model_name(model: ChatGoogleGenerativeAI) -> str:
+    """
+    配置中使用的模型名。langchain-google-genai 会把模型名改写为 "models/<名称>"
+    """
+    return model.model.removeprefix("models/")
+
+
+def _record_usage(model: ChatGoogleGenerativeAI, kind: str, usage: Optional[dict]):
+    """
+    记录调用次数与 token 用量
+    """
+    usage = usage or {}
+    input_tokens = usage.get("input_tokens", 0)
+    output_tokens = usage.get("output_tokens", 0)
+    name = model_name(model)
+    metrics.llm_calls_total.inc(model=name, kind=kind)
+    metrics.llm_tokens_total.inc(input_tokens, model=name, direction="input")
+    metrics.llm_tokens_total.inc(output_tokens, model=name, direction="output")
+    if (current := _usage.get()) is not None:
+        current.calls += 1
+        current.tokens += input_tokens + output_tokens
+    budget.record(name, input_tokens, output_tokens)
+
+
+async def stream_invoke(
+        model: ChatGoogleGenerativeAI,
+        prompt: str,
+        kind: str,
+        json_object: bool = False,
+        max_chars: Optional[int] = None,
+) -> str:
+    """
+    流式调用 LLM 并返回文本。
+    json_object 为 True 时，第一个 JSON 对象完整输出后即停止生成，返回该对象的文本；
+    max_chars 限制纯文本长度，超出后停止生成并截断到最后一个完整句子。
+    """
+    await _wait_rate_limit()
+    scanner = JSONObjectScanner() if json_object else None
+    text = ""
+    usage = None
+    stream = model.astream(prompt)
+    try:
+        async for chunk in stream:
+            if chunk.usage_metadata:
+                usage = add_usage(usage, chunk.usage_metadata)
+            text += chunk.text
+            if scanner is not None and scanner.feed(text):
+                metrics.llm_early_stops_total.inc(kind=kind, reason="complete")
+                text = scanner.object_text(text)
+                break
+            if max_chars is not None and len(text) > max_chars:
+                metrics.llm_early_stops_total.inc(kind=kind, reason="length")
+                end = text.rfind("。", 0, max_chars)
+                text = text[:end + 1] if end > 0 else text[:max_chars]
+                logger.warning("%s 输出超过 %d 字，已提前停止", kind, max_chars)
+                break
+    finally:
+        await stream.aclose()
+        # 提前停止时服务端不会返回用量，按字符数估算（中文约每字一个 token），以免低估预算
+        if not usage:
+            usage = {"input_tokens": len(prompt), "output_tokens": len(text)}
+        _record_usage(model, kind, usage)
+    return text
+
+
+async def invoke_json(
+        model: ChatGoogleGenerativeAI,
+        prompt: str,
+        kind: str,
+        parser: StructuredOutputParser,
+) -> dict:
+    """
+    流式调用 LLM 并解析 JSON 输出。
+    解析失败时先在本地修复，修复失败才重新请求
+    """
+    required = [schema.name for schema in parser.response_schemas]
+    for attempt in range(LLM_JSON_RETRIES + 1):
+        text = await stream_invoke(model, prompt, kind, json_object=True)
+        try:
+            return parser.parse(text)
+        except OutputParserException as e:
+            repaired = repair_json(text)
+            if repaired is not None and all(key in repaired for key in required):
+                metrics.llm_json_repairs_total.inc(kind=kind, result="repaired")
+                logger.info("%s 输出的 JSON 格式有误，已在本地修复", kind)
+                return repaired
+            metrics.llm_json_repairs_total.inc(kind=kind, result="failed")
+            if attempt == LLM_JSON_RETRIES:
+                raise
+            logger.warning("%s 输出的 JSON 无法解析，重新请求: %s", kind, e)
 
 
 async def run_sequence(
@@ -149,51 +311,77 @@ async def run_sequence(
     summary: str,
     text: str,
 ) -> LLMOutputs:
-    # 过滤
-    logger.info("开始LLM过滤")
-    useful = await filter_article(summary, text, title)
+    usage = LLMUsage()
+    _usage.set(usage)
+    level = budget.level()
+    if level > BudgetLevel.Normal:
+        logger.info("LLM 预算紧张（%s），降级处理", level.name)
+    # 过滤，预过滤模型有把握时不调用 LLM；预算紧张时降低置信度要求
+    decision, need_audit = prefilter.decide(title, summary, text, threshold=PREFILTER_BUDGET_THRESHOLDS.get(level))
+    if decision is None or need_audit:
+        logger.info("开始LLM过滤")
+        with metrics.track_stage("llm_filter"):
+            useful = await filter_article(summary, text, title)
+        await prefilter.record_verdict(title, summary, text, useful)
+        if decision is not None:
+            prefilter.audit(decision, useful)
+    else:
+        useful = decision
+        logger.info("预过滤结论: %s", "通过" if useful else "不通过")
     if not useful:
-        return LLMOutputs(is_ok=False)
+        return LLMOutputs(is_ok=False, llm_calls=usage.calls, tokens=usage.tokens)
     logger.info("通过LLM过滤")
     # 生成素材
-    summary, themes, material_title = await gen_material(text, title)
+    with metrics.track_stage("gen_material"):
+        summary, themes, material_title = await gen_material(text, title)
     logger.info("生成素材完成")
-    # 生成例文
-    examples = []
-    for i in range(3):
-        logger.info("生成例文%s", i + 1)
-        artical = await gen_artical(summary, themes, material_title)
-        examples.append(artical)
+    count, rounds = BUDGET_EXAMPLE_PLAN[level]
+    examples = await gen_examples(summary, themes, material_title, count=count, max_rounds=rounds)
     return LLMOutputs(
         is_ok=True,
         title=material_title,
         summary=summary,
         themes=themes,
         example=examples,
+        llm_calls=usage.calls,
+        tokens=usage.tokens,
+        prompt_version=PROMPT_VERSION,
     )
 
 
-async def gen_artical(summary: str, themes: str, title: str) -> str:
+async def gen_examples(summary: str, themes: str, title: str, count: int = 3, max_rounds: int = 3) -> list[str]:
+    examples = []
+    for i in range(count):
+        logger.info("生成例文%s", i + 1)
+        with metrics.track_stage("gen_example"):
+            artical = await gen_artical(summary, themes, title, max_rounds)
+        examples.append(artical)
+    return examples
+
+
+async def gen_artical(summary: str, themes: str, title: str, max_rounds: int = 3) -> str:
+    """
+    生成例文，最多进行 max_rounds 轮评分与重写
+    """
     prompt = writer_prompt.format(
         title=title,
         summary=summary,
         themes=themes,
     )
-    resp = await llm.ainvoke(prompt)
-    example = resp.text
+    example = await stream_invoke(llm, prompt, "write", max_chars=LLM_MAX_EXAMPLE_CHARS)
     logger.info("生成初稿完成")
 
     n = 1
-    while n <= 3:
+    while n <= max_rounds:
         # 评分
         prompt = score_prompt.format(
             summary=summary,
             themes=themes,
             example=example,
         )
-        resp = await llm.ainvoke(prompt)
-        parsed = score_parser.parse(resp.text)
+        parsed = await invoke_json(llm, prompt, "score", score_parser)
         is_ok = parsed["is_ok"].lower().startswith("y")
+        metrics.score_total.inc(result="pass" if is_ok else "fail")
         logger.info("评分完成，第%d轮，结果：%s" % (n, "通过" if is_ok else "不通过"))
         if is_ok:
             break
@@ -205,8 +393,7 @@ async def gen_artical(summary: str, themes: str, title: str) -> str:
             summary=summary,
             themes=themes,
         )
-        resp = await llm.ainvoke(prompt)
-        example = resp.text
+        example = await stream_invoke(llm, prompt, "rewrite", max_chars=LLM_MAX_EXAMPLE_CHARS)
         logger.info("重写完成")
 
         n += 1
@@ -219,8 +406,7 @@ async def gen_material(text: str, title: str) -> tuple[str, str, str]:
         title=title,
         text=text,
     )
-    resp = await llm.ainvoke(prompt)
-    parsed = synthesize_parser.parse(resp.text)
+    parsed = await invoke_json(llm, prompt, "synthesize", synthesize_parser)
     synth_title = parsed["title"]
     synth_summary = parsed["summary"]
     synth_themes = parsed["themes"]
@@ -233,7 +419,6 @@ async def filter_article(summary: str, text: str, title: str) -> bool:
         summary=summary,
         text=text[:500]
     )
-    resp = await llm_lite.ainvoke(prompt)
-    parsed = filter_parser.parse(resp.text)
+    parsed = await invoke_json(llm_lite, prompt, "filter", filter_parser)
     useful = parsed["useful"].lower().startswith("y")
     return useful
@@ -1,25 +1,48 @@
+import importlib
+import importlib.metadata
+import logging
+import pkgutil
+
 from . import common
-from . import chinanews
+from . import registry
 
 from .common import *
+from .registry import NewsSource, get_source, register_source, source_for_article, sources
+
+logger = logging.getLogger(__name__)
+
+# 第三方包可以通过该入口点组注册新闻源模块
+ENTRY_POINT_GROUP = "materialgen.news_sources"
+
+
+def discover_sources():
+    """
+    导入本包内的所有新闻源模块以及入口点声明的模块，模块通过 register_source 完成注册
+    """
+    for module in pkgutil.iter_modules(__path__):
+        if module.name not in ("common", "registry", "snapshots"):
+            importlib.import_module(f"{__name__}.{module.name}")
+    for entry_point in importlib.metadata.entry_points(group=ENTRY_POINT_GROUP):
+        try:
+            entry_point.load()
+        except Exception as e:
+            logger.error("新闻源插件加载失败 %s: %s", entry_point.name, e)
+    registry.load_settings()
 
 
 def get_all_rss_urls() -> list[str]:
-    rss = []
-    for names in globals():
-        mod = globals()[names]
-        if hasattr(mod, "NEWS_URLS"):
-            rss.extend(mod.NEWS_URLS)
+    return [url for source in sources.values() if source.enabled for url in source.feed_urls]
+
 
-    return rss
+def get_poll_intervals() -> dict[str, float]:
+    return {url: source.poll_interval for source in sources.values() for url in source.feed_urls}
 
 
 async def parse_article(rss_url: str, article_url: str) -> Article | None:
-    mod = None
-    for names in globals():
-        mod = globals()[names]
-        if hasattr(mod, "NEWS_URLS") and rss_url in mod.NEWS_URLS:
-            break
-    if not mod or not hasattr(mod, "parse"):
+    source = get_source(rss_url)
+    if source is None:
         return None
-    return await mod.parse(article_url)
+    return await source.fetch(article_url)
+
+
+discover_sources()
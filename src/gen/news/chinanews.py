@@ -5,12 +5,14 @@ from aiohttp.web_exceptions import HTTPException
 from bs4 import BeautifulSoup as bs
 
 from .common import Article, request_url
+from .registry import register_source
 
 NEWS_URLS = [
     "https://www.chinanews.com.cn/rss/scroll-news.xml"
 ]
 
 
+@register_source("chinanews", NEWS_URLS)
 async def parse(url: str) -> Optional[Article]:
     async with aiohttp.ClientSession() as session:
         try:
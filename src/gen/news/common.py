@@ -1,5 +1,7 @@
 import dataclasses
 
+from . import snapshots
+
 
 @dataclasses.dataclass
 class Article:
@@ -24,13 +26,21 @@ def get_user_agent() -> str:
 
 
 async def request_url(url: str, session) -> str:
+    """
+    获取网页内容，新鲜度窗口内有快照时直接读取本地快照
+    """
+    if (text := await snapshots.get(url)) is not None:
+        return text
+
     headers = {}
     if USER_AGENT:
         headers["User-Agent"] = USER_AGENT
 
     async with session.get(url, headers=headers) as response:
         response.raise_for_status()
-        return await response.text()
+        text = await response.text()
+    await snapshots.put(url, text)
+    return text
 
 
 def filter_article(
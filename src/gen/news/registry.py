@@ -0,0 +1,150 @@
+import asyncio
+import dataclasses
+import json
+import logging
+import time
+import urllib.parse
+from typing import Awaitable, Callable, Optional
+
+from db.db import data_path
+from .common import Article
+
+logger = logging.getLogger(__name__)
+
+settings_path = data_path / "sources.json"
+
+ParseFunc = Callable[[str], Awaitable[Optional[Article]]]
+
+# 可在管理页面修改的设置项
+EDITABLE_SETTINGS = ("poll_interval", "concurrency", "rate_limit", "enabled")
+
+
+@dataclasses.dataclass
+class NewsSource:
+    name: str
+    feed_urls: list[str]
+    parse: ParseFunc
+    # 拉取 RSS 的间隔（秒）
+    poll_interval: float = 60.0
+    # 同时抓取的文章数
+    concurrency: int = 4
+    # 每秒最多请求数，0 表示不限制
+    rate_limit: float = 0.0
+    enabled: bool = True
+    _semaphore: Optional[asyncio.Semaphore] = dataclasses.field(default=None, repr=False)
+    _rate_lock: Optional[asyncio.Lock] = dataclasses.field(default=None, repr=False)
+    _last_request: float = dataclasses.field(default=0.0, repr=False)
+
+    def settings(self) -> dict:
+        return {key: getattr(self, key) for key in EDITABLE_SETTINGS}
+
+    async def _wait_rate_limit(self):
+        if self.rate_limit <= 0:
+            return
+        if self._rate_lock is None:
+            self._rate_lock = asyncio.Lock()
+        async with self._rate_lock:
+            delay = self._last_request + 1 / self.rate_limit - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._last_request = time.monotonic()
+
+    async def fetch(self, article_url: str) -> Optional[Article]:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            await self._wait_rate_limit()
+            return await self.parse(article_url)
+
+
+sources: dict[str, NewsSource] = {}
+# RSS 地址 -> 新闻源
+feed_index: dict[str, NewsSource] = {}
+
+
+def register_source(name: str, feed_urls: list[str], **settings) -> Callable[[ParseFunc], ParseFunc]:
+    """
+    注册新闻源的装饰器，用于文章解析函数:
+
+        @register_source("chinanews", NEWS_URLS, poll_interval=60)
+        async def parse(url: str) -> Optional[Article]: ...
+    """
+    def decorator(func: ParseFunc) -> ParseFunc:
+        source = NewsSource(name=name, feed_urls=list(feed_urls), parse=func, **settings)
+        sources[name] = source
+        for url in source.feed_urls:
+            feed_index[url] = source
+        return func
+
+    return decorator
+
+
+def get_source(rss_url: str) -> Optional[NewsSource]:
+    return feed_index.get(rss_url)
+
+
+def source_for_article(article_url: str) -> Optional[NewsSource]:
+    """
+    根据文章地址的域名查找新闻源，用于没有 RSS 地址的历史数据
+    """
+    host = urllib.parse.urlsplit(article_url).hostname or ""
+    for source in sources.values():
+        for url in source.feed_urls:
+            feed_host = urllib.parse.urlsplit(url).hostname or ""
+            if host == feed_host or host.endswith("." + feed_host.removeprefix("www.")):
+                return source
+    return None
+
+
+def load_settings():
+    """
+    从 data/sources.json 读取管理页面保存的设置
+    """
+    if not settings_path.exists():
+        return
+    try:
+        saved: dict[str, dict] = json.loads(settings_path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as e:
+        logger.error("新闻源设置读取失败: %s", e)
+        return
+    for name, values in saved.items():
+        if name in sources:
+            try:
+                apply_settings(sources[name], values, save=False)
+            except (TypeError, ValueError) as e:
+                logger.error("新闻源 %s 的设置无效: %s", name, e)
+
+
+def save_settings():
+    data = {name: source.settings() for name, source in sources.items()}
+    settings_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def _check_type(key: str, value) -> bool:
+    # bool 是 int 的子类，数值字段需要单独排除；整数可以用于浮点字段
+    if key == "enabled":
+        return isinstance(value, bool)
+    if isinstance(value, bool):
+        return False
+    if key == "concurrency":
+        return isinstance(value, int)
+    return isinstance(value, (int, float))
+
+
+def apply_settings(source: NewsSource, values: dict, save: bool = True):
+    """
+    更新新闻源设置，类型不符时抛出 TypeError 而不是强制转换（例如 "false" 会被转换为 True）
+    """
+    for key in EDITABLE_SETTINGS:
+        if key in values and not _check_type(key, values[key]):
+            raise TypeError(f"invalid type for {key}: {values[key]!r}")
+    updated = {key: type(getattr(source, key))(values[key]) for key in EDITABLE_SETTINGS if key in values}
+    if updated.get("poll_interval", 1) <= 0 or updated.get("concurrency", 1) < 1 or updated.get("rate_limit", 0) < 0:
+        raise ValueError("invalid source settings")
+    for key, value in updated.items():
+        setattr(source, key, value)
+    # 并发数与限速变化后重新创建
+    source._semaphore = None
+    source._rate_lock = None
+    if save:
+        save_settings()
@@ -0,0 +1,167 @@
+"""
+抓取到的文章 HTML 快照。
+
+正文以 zstd 压缩后按内容哈希保存在 data/snapshots/objects，
+index.jsonl 记录 URL、抓取时间与内容哈希。新鲜度窗口内的请求直接读取本地快照，
+重新处理文章或测试解析器时无需重新下载。
+"""
+import asyncio
+import contextlib
+import contextvars
+import hashlib
+import json
+import logging
+import math
+import threading
+import time
+from typing import Iterator, Optional
+
+from config import SNAPSHOT_ENABLED, SNAPSHOT_MAX_AGE
+from core import metrics
+from db.db import data_path
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+snapshots_path = data_path / "snapshots"
+objects_path = snapshots_path / "objects"
+index_path = snapshots_path / "index.jsonl"
+
+COMPRESSION_LEVEL = 10
+
+# 当前上下文中快照的最大可用时长（秒）
+_max_age: contextvars.ContextVar[float] = contextvars.ContextVar("snapshot_max_age", default=SNAPSHOT_MAX_AGE)
+
+# URL -> [(抓取时间, 内容哈希)]，按抓取时间升序
+_index: dict[str, list[tuple[float, str]]] = {}
+_index_loaded = False
+_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return SNAPSHOT_ENABLED and zstandard is not None
+
+
+@contextlib.contextmanager
+def freshness(max_age: float):
+    """
+    临时修改快照的新鲜度窗口，math.inf 表示只要有快照就不访问网络
+    """
+    token = _max_age.set(max_age)
+    try:
+        yield
+    finally:
+        _max_age.reset(token)
+
+
+def offline():
+    return freshness(math.inf)
+
+
+def _object_path(digest: str):
+    return objects_path / digest[:2] / f"{digest}.zst"
+
+
+def _load_index():
+    global _index_loaded
+    with _lock:
+        if _index_loaded:
+            return
+        lines = 0
+        if index_path.exists():
+            with index_path.open(encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    lines += 1
+                    _index.setdefault(record["url"], []).append((record["time"], record["hash"]))
+        for versions in _index.values():
+            versions.sort()
+        _index_loaded = True
+        logger.info("已加载 %d 个网页快照", len(_index))
+    # 同一 URL 的重复记录过多时压缩索引
+    if lines > 2 * sum(len(v) for v in _index.values()) + 1000:
+        _compact_index()
+
+
+def _compact_index():
+    with _lock:
+        tmp_path = index_path.with_suffix(".tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            for url, versions in _index.items():
+                for fetched_at, digest in versions:
+                    f.write(json.dumps({"url": url, "time": fetched_at, "hash": digest}) + "\n")
+        tmp_path.replace(index_path)
+
+
+def _lookup(url: str, max_age: float) -> Optional[str]:
+    _load_index()
+    versions = _index.get(url)
+    if not versions:
+        return None
+    fetched_at, digest = versions[-1]
+    if time.time() - fetched_at > max_age:
+        return None
+    path = _object_path(digest)
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return None
+    return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+
+
+def _store(url: str, text: str):
+    _load_index()
+    data = text.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()
+    path = _object_path(digest)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(zstandard.ZstdCompressor(level=COMPRESSION_LEVEL).compress(data))
+        tmp_path.replace(path)
+    fetched_at = round(time.time(), 3)
+    with _lock:
+        versions = _index.setdefault(url, [])
+        # 内容未变化时只更新抓取时间
+        if versions and versions[-1][1] == digest:
+            versions[-1] = (fetched_at, digest)
+        else:
+            versions.append((fetched_at, digest))
+        with index_path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps({"url": url, "time": fetched_at, "hash": digest}) + "\n")
+
+
+async def get(url: str) -> Optional[str]:
+    """
+    返回新鲜度窗口内的快照，没有时返回 None
+    """
+    if not enabled():
+        return None
+    text = await asyncio.to_thread(_lookup, url, _max_age.get())
+    metrics.snapshot_requests_total.inc(result="hit" if text is not None else "miss")
+    return text
+
+
+async def put(url: str, text: str):
+    if not enabled():
+        return
+    try:
+        await asyncio.to_thread(_store, url, text)
+    except OSError as e:
+        logger.error("网页快照保存失败 %s: %s", url, e)
+
+
+def urls() -> Iterator[str]:
+    """
+    所有有快照的 URL
+    """
+    _load_index()
+    with _lock:
+        return iter(list(_index))
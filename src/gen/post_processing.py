@@ -1,15 +1,21 @@
+import asyncio
 import datetime
+import re
 import uuid
 from string import Template
 import logging
+from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import String, insert
+from sqlalchemy import String, insert, select, update
 
+from core import publish, related
 from db.db import AsyncSessionLocal, files_path
 from db.models import Markdown
-from .llm_parse import LLMOutputs
 from .news.common import Article
 
+if TYPE_CHECKING:
+    from .llm_parse import LLMOutputs
+
 
 logger = logging.getLogger(__name__)
 
@@ -25,14 +31,7 @@ ${summary}
 ${themes}
 
 ### 例文：
-例文1
-${example1}
-
-例文2
-${example2}
-
-例文3
-${example3}
+${examples}
 
 > 更新时间: ${update_time}
 >
@@ -42,7 +41,38 @@ ${example3}
 )
 
 
-async def save_markdown(content: str, title: str) -> str:
+markdown_pattern = re.compile(
+    r"^## (?P<title>.*?)\n\n"
+    r"### 简介:\n(?P<summary>.*?)\n\n"
+    r"### 适用主题:\n(?P<themes>.*?)\n\n"
+    r"### 例文：\n(?P<examples>.*?)\n\n"
+    r"> 更新时间: (?P<update_time>.*?)\n>\n"
+    r"> 来源: (?P<source>.*) \((?P<link>.*)\)$",
+    re.S
+)
+example_split_pattern = re.compile(r"^例文\d+\n", re.M)
+
+
+def parse_markdown(content: str) -> Optional[dict]:
+    """
+    将按 markdown_template 生成的内容解析回结构化字段，格式不符时返回 None
+    """
+    match = markdown_pattern.match(content.strip())
+    if not match:
+        return None
+    fields = match.groupdict()
+    examples = fields.pop("examples")
+    fields["examples"] = [e.strip() for e in example_split_pattern.split(examples) if e.strip()]
+    return fields
+
+
+async def save_markdown(
+    content: str,
+    title: str,
+    themes: Optional[str] = None,
+    source: Optional[str] = None,
+    prompt_version: Optional[str] = None
+) -> str:
     # 生成唯一ID
     md_id = uuid.uuid4().hex
     date = datetime.datetime.now().strftime("%Y-%m-%d")
@@ -62,29 +92,69 @@ async def save_markdown(content: str, title: str) -> str:
             id=md_id,
             date=date,
             path=str(file_path.relative_to(files_path)),
-            title=title
+            title=title,
+            themes=themes,
+            source=source,
+            prompt_version=prompt_version
         )
         await session.execute(stmt)
         await session.commit()
 
+    parsed = parse_markdown(content)
+    await related.add(md_id, title, parsed["summary"] if parsed else "", themes or "")
+    await publish.update(saved=[md_id])
     return md_id
 
 
-async def post_process_material(
-    material: LLMOutputs,
-    article: Article
-):
-    md = markdown_template.substitute(
+def render_markdown(material: "LLMOutputs", update_time: str, source: str, link: str) -> str:
+    return markdown_template.substitute(
         title=material.title,
         summary=material.summary,
         themes=material.themes,
-        example1=material.example[0],
-        example2=material.example[1],
-        example3=material.example[2],
-        update_time=article.pub_date,
-        source=article.source,
-        link=article.link,
+        # 预算不足时例文可能少于三篇
+        examples="\n\n".join(f"例文{i}\n{example}" for i, example in enumerate(material.example, 1)),
+        update_time=update_time,
+        source=source,
+        link=link,
     )
-    md_id = await save_markdown(md, material.title)
+
+
+async def post_process_material(
+    material: "LLMOutputs",
+    article: Article
+):
+    md = render_markdown(material, article.pub_date, article.source, article.link)
+    md_id = await save_markdown(md, material.title, material.themes, article.source, material.prompt_version)
     logger.info(f"保存md文件, id: {md_id}")
 
+
+async def backfill_material_fields(batch_size: int = 500):
+    """
+    为旧数据补全 themes、source 列，从已保存的 md 文件中解析
+    """
+    def read_fields(paths: list[str]) -> list[dict]:
+        result = []
+        for path in paths:
+            try:
+                parsed = parse_markdown((files_path / path).read_text(encoding="utf-8"))
+            except OSError:
+                parsed = None
+            result.append({
+                "themes": parsed["themes"] if parsed else "",
+                "source": parsed["source"] if parsed else "",
+            })
+        return result
+
+    async with AsyncSessionLocal() as session:
+        # noinspection PyTypeChecker
+        stmt = select(Markdown.id, Markdown.path).where(Markdown.themes.is_(None) | Markdown.source.is_(None))
+        rows = (await session.execute(stmt)).all()
+        for i in range(0, len(rows), batch_size):
+            batch = rows[i:i + batch_size]
+            fields = await asyncio.to_thread(read_fields, [row.path for row in batch])
+            for row, values in zip(batch, fields):
+                # noinspection PyTypeChecker
+                await session.execute(update(Markdown).where(Markdown.id == row.id).values(**values))
+            await session.commit()
+    if rows:
+        logger.info("已补全%d条素材的主题与来源", len(rows))
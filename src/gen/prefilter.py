@@ -0,0 +1,209 @@
+"""
+LLM 过滤前的本地预过滤分类器。
+
+使用字符 n-gram 哈希特征的逻辑回归，根据历史 LLM 过滤结论训练，
+对置信度足够高的文章直接给出结论，省去一次 LLM 调用。
+"""
+import asyncio
+import datetime
+import json
+import logging
+import random
+import zlib
+from typing import Optional
+
+from config import PREFILTER_AUDIT_RATE, PREFILTER_ENABLED, PREFILTER_THRESHOLD
+from core import metrics
+from db.db import data_path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+prefilter_path = data_path / "prefilter"
+verdicts_path = prefilter_path / "verdicts.jsonl"
+model_path = prefilter_path / "model.npz"
+
+HASH_BITS = 18
+NGRAM_SIZES = (1, 2, 3)
+TEXT_LIMIT = 500
+
+
+def features(title: str, summary: str, text: str) -> tuple[list[int], list[float]]:
+    """
+    将文本转换为稀疏特征：哈希后的字符 n-gram 下标与 L2 归一化的计数
+    """
+    counts: dict[int, int] = {}
+    mask = (1 << HASH_BITS) - 1
+    for field, content in (("t", title), ("s", summary), ("x", text[:TEXT_LIMIT])):
+        for n in NGRAM_SIZES:
+            for i in range(len(content) - n + 1):
+                index = zlib.crc32(f"{field}{content[i:i + n]}".encode("utf-8")) & mask
+                counts[index] = counts.get(index, 0) + 1
+    norm = sum(c * c for c in counts.values()) ** 0.5 or 1.0
+    return list(counts.keys()), [c / norm for c in counts.values()]
+
+
+class Model:
+    def __init__(self, weights, bias: float):
+        self.weights = weights
+        self.bias = bias
+
+    def predict(self, title: str, summary: str, text: str) -> float:
+        """
+        返回文章适合作为素材的概率
+        """
+        indices, values = features(title, summary, text)
+        z = float(np.dot(self.weights[indices], values)) + self.bias
+        return 1 / (1 + np.exp(-z))
+
+    def save(self):
+        prefilter_path.mkdir(parents=True, exist_ok=True)
+        np.savez(model_path, weights=self.weights, bias=np.array([self.bias]))
+
+    @classmethod
+    def load(cls) -> Optional["Model"]:
+        if np is None or not model_path.exists():
+            return None
+        data = np.load(model_path)
+        return cls(data["weights"], float(data["bias"][0]))
+
+
+_model: Optional[Model] = None
+_model_loaded = False
+
+
+def get_model() -> Optional[Model]:
+    global _model, _model_loaded
+    if not _model_loaded:
+        _model = Model.load()
+        _model_loaded = True
+        if _model is not None:
+            logger.info("已加载预过滤模型")
+    return _model
+
+
+def _append_verdict(line: str):
+    prefilter_path.mkdir(parents=True, exist_ok=True)
+    with verdicts_path.open("a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+async def record_verdict(title: str, summary: str, text: str, useful: bool):
+    """
+    记录 LLM 的过滤结论，作为训练数据
+    """
+    line = json.dumps({
+        "ts": datetime.datetime.now().isoformat(timespec="seconds"),
+        "title": title,
+        "summary": summary,
+        "text": text[:TEXT_LIMIT],
+        "useful": useful,
+    }, ensure_ascii=False)
+    await asyncio.to_thread(_append_verdict, line)
+
+
+def decide(
+        title: str,
+        summary: str,
+        text: str,
+        threshold: Optional[float] = None
+) -> tuple[Optional[bool], bool]:
+    """
+    返回 (结论, 是否需要抽查)。结论为 None 表示置信度不足，需要调用 LLM；
+    抽查时即使有结论也应调用 LLM 并用 audit 记录是否一致。
+    threshold 低于默认阈值时（如预算紧张）不再抽查。
+    """
+    if not PREFILTER_ENABLED or (model := get_model()) is None:
+        return None, False
+    relaxed = threshold is not None and threshold < PREFILTER_THRESHOLD
+    threshold = threshold or PREFILTER_THRESHOLD
+    p = model.predict(title, summary, text)
+    if p >= threshold:
+        decision = True
+    elif p <= 1 - threshold:
+        decision = False
+    else:
+        metrics.prefilter_decisions_total.inc(decision="uncertain")
+        return None, False
+    metrics.prefilter_decisions_total.inc(decision="accept" if decision else "reject")
+    return decision, not relaxed and random.random() < PREFILTER_AUDIT_RATE
+
+
+def audit(decision: bool, useful: bool):
+    metrics.prefilter_audit_total.inc(result="agree" if decision == useful else "disagree")
+
+
+def load_verdicts() -> list[dict]:
+    if not verdicts_path.exists():
+        return []
+    verdicts = []
+    with verdicts_path.open(encoding="utf-8") as f:
+        for line in f:
+            try:
+                verdicts.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return verdicts
+
+
+def train(
+        verdicts: list[dict],
+        epochs: int = 10,
+        learning_rate: float = 0.5,
+        l2: float = 1e-6,
+        holdout: float = 0.2,
+        threshold: float = PREFILTER_THRESHOLD,
+        seed: int = 0
+) -> tuple[Model, dict]:
+    """
+    用 SGD 训练逻辑回归，返回模型与留出集上的评估结果
+    """
+    if np is None:
+        raise RuntimeError("训练预过滤模型需要安装 numpy")
+    rng = random.Random(seed)
+    samples = [
+        (*features(v["title"], v["summary"], v["text"]), 1.0 if v["useful"] else 0.0)
+        for v in verdicts
+    ]
+    rng.shuffle(samples)
+    split = int(len(samples) * (1 - holdout))
+    train_set, test_set = samples[:split], samples[split:]
+
+    weights = np.zeros(1 << HASH_BITS, dtype=np.float64)
+    bias = 0.0
+    for epoch in range(epochs):
+        rng.shuffle(train_set)
+        lr = learning_rate / (1 + epoch)
+        for indices, values, label in train_set:
+            values_arr = np.asarray(values)
+            z = float(np.dot(weights[indices], values_arr)) + bias
+            p = 1 / (1 + np.exp(-z))
+            grad = p - label
+            weights[indices] -= lr * (grad * values_arr + l2 * weights[indices])
+            bias -= lr * grad
+
+    model = Model(weights, bias)
+
+    # 评估：整体准确率，以及置信预测的覆盖率（可省去的 LLM 调用比例）和一致率
+    correct = confident = confident_correct = 0
+    for indices, values, label in test_set:
+        z = float(np.dot(weights[indices], values)) + bias
+        p = 1 / (1 + np.exp(-z))
+        predicted = 1.0 if p >= 0.5 else 0.0
+        correct += predicted == label
+        if p >= threshold or p <= 1 - threshold:
+            confident += 1
+            confident_correct += predicted == label
+    total = len(test_set) or 1
+    report = {
+        "train": len(train_set),
+        "test": len(test_set),
+        "accuracy": correct / total,
+        "coverage": confident / total,
+        "agreement": confident_correct / confident if confident else None,
+    }
+    return model, report
@@ -0,0 +1,108 @@
+import asyncio
+import bisect
+import datetime
+import email.utils
+import itertools
+import math
+import time
+from typing import Any, Optional
+
+from config import (
+    PRIORITY_AGING_PER_MINUTE,
+    PRIORITY_NEGATIVE_KEYWORDS,
+    PRIORITY_POSITIVE_KEYWORDS,
+    PRIORITY_SOURCE_WEIGHTS,
+)
+from .news.common import Article
+
+
+def _parse_published(published: Optional[str]) -> Optional[datetime.datetime]:
+    if not published:
+        return None
+    try:
+        dt = email.utils.parsedate_to_datetime(published)
+    except (TypeError, ValueError):
+        try:
+            dt = datetime.datetime.fromisoformat(published)
+        except ValueError:
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return dt
+
+
+def score_article(article: Article, title: str, summary: str, published: Optional[str]) -> float:
+    """
+    用本地特征估计文章作为素材的价值，分数越高越优先处理
+    """
+    score = 0.0
+
+    # 正文长度：800-5000 字最合适
+    length = len(article.text)
+    if length:
+        score += min(math.log(length / 400, 2), 3.5)
+        if length > 8000:
+            score -= 1
+
+    # 图片越多，越可能是图集类新闻
+    if length:
+        score -= min(article.image_counts * 400 / length, 2)
+
+    # 来源权重
+    score += PRIORITY_SOURCE_WEIGHTS.get(article.source, 0)
+
+    # 关键词
+    text = f"{title} {summary}"
+    score += sum(1 for keyword in PRIORITY_POSITIVE_KEYWORDS if keyword in text)
+    score -= sum(1 for keyword in PRIORITY_NEGATIVE_KEYWORDS if keyword in text)
+
+    # 新鲜度：每过 6 小时扣 1 分，最多扣 3 分
+    if published_at := _parse_published(published):
+        hours = (datetime.datetime.now(datetime.timezone.utc) - published_at).total_seconds() / 3600
+        score -= min(max(hours, 0) / 6, 3)
+
+    return score
+
+
+class PriorityQueue:
+    """
+    有容量上限的优先队列。
+    等待时间会提高优先级（aging），避免低分条目一直得不到处理；
+    队列满时丢弃有效优先级最低的条目。
+    """
+
+    def __init__(self, maxsize: int, aging_per_minute: float = PRIORITY_AGING_PER_MINUTE):
+        self.maxsize = maxsize
+        self.aging_per_second = aging_per_minute / 60
+        # 按排序键升序保存 (key, seq, item)，末尾是最优先的条目
+        self.items: list[tuple[float, int, Any]] = []
+        self.counter = itertools.count()
+        self.not_empty = asyncio.Event()
+        self.dropped = 0
+
+    def _key(self, priority: float) -> float:
+        # 有效优先级 = priority + aging * (now - 入队时间)，其中 now 对所有条目相同，
+        # 因此按 priority - aging * 入队时间 排序即可，无需随时间重排
+        return priority - self.aging_per_second * time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def put(self, item: Any, priority: float) -> Optional[Any]:
+        """
+        放入条目，返回因队列已满被丢弃的条目（可能就是刚放入的条目）
+        """
+        entry = (self._key(priority), next(self.counter), item)
+        bisect.insort(self.items, entry, key=lambda e: (e[0], -e[1]))
+        dropped = None
+        if len(self.items) > self.maxsize:
+            dropped = self.items.pop(0)[2]
+            self.dropped += 1
+        self.not_empty.set()
+        return dropped
+
+    async def get(self) -> Any:
+        while not self.items:
+            self.not_empty.clear()
+            await self.not_empty.wait()
+        return self.items.pop()[2]
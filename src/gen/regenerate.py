@@ -0,0 +1,187 @@
+"""
+用新的提示词重新生成已有素材。
+
+按日期、主题与提示词版本选择素材，只重跑版本已过期的阶段：
+素材提示词变化时重新抓取原文（优先使用本地快照）并生成标题、简介与主题，
+例文提示词变化时只重新生成例文。新内容写入新文件，数据库更新成功后才删除旧文件。
+"""
+import asyncio
+import dataclasses
+import datetime
+import logging
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Optional
+
+from sqlalchemy import or_, select, update
+
+from core import metrics, publish, related
+from db import storage
+from db.db import AsyncSessionLocal, files_path
+from db.models import Markdown
+from gen import budget, load_llm, news
+from gen.post_processing import parse_markdown, render_markdown
+
+logger = logging.getLogger(__name__)
+
+# 没有记录提示词版本的旧素材
+LEGACY_VERSION = "legacy"
+
+STAGES = ("auto", "examples", "all")
+
+
+@dataclasses.dataclass
+class RegenerateStats:
+    selected: int = 0
+    done: int = 0
+    regenerated: int = 0
+    material_stage: int = 0
+    failed: int = 0
+    llm_calls: int = 0
+    tokens: int = 0
+    started: float = dataclasses.field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+
+async def select_materials(
+        start: Optional[datetime.date] = None,
+        end: Optional[datetime.date] = None,
+        theme: Optional[str] = None,
+        versions: Optional[list[str]] = None,
+        include_current: bool = False,
+        limit: Optional[int] = None,
+) -> list[Markdown]:
+    """
+    versions 指定要重新生成的提示词版本（legacy 表示未记录版本的旧素材），
+    未指定时选择所有版本不是当前版本的素材
+    """
+    llm_parse = await load_llm()
+    stmt = select(Markdown).order_by(Markdown.date, Markdown.id)
+    if start:
+        stmt = stmt.where(Markdown.date >= start.isoformat())
+    if end:
+        stmt = stmt.where(Markdown.date <= end.isoformat())
+    if theme:
+        stmt = stmt.where(Markdown.themes.contains(theme))
+    if versions:
+        conditions = [Markdown.prompt_version.in_([v for v in versions if v != LEGACY_VERSION])]
+        if LEGACY_VERSION in versions:
+            conditions.append(Markdown.prompt_version.is_(None))
+        stmt = stmt.where(or_(*conditions))
+    elif not include_current:
+        # noinspection PyTypeChecker
+        stmt = stmt.where(or_(Markdown.prompt_version.is_(None), Markdown.prompt_version != llm_parse.PROMPT_VERSION))
+    if limit:
+        stmt = stmt.limit(limit)
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(stmt)
+        return list(result.scalars().all())
+
+
+def _write_file(path: Path, content: str):
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(content, encoding="utf-8")
+    tmp_path.replace(path)
+
+
+async def regenerate_material(markdown: Markdown, stages: str = "auto") -> bool:
+    """
+    重新生成一条素材，返回是否重新生成了素材阶段。失败时抛出异常，旧版本保持不变
+    """
+    llm_parse = await load_llm()
+    await budget.wait_for_budget()
+    old_path = files_path / markdown.path
+    content = await asyncio.to_thread(old_path.read_text, encoding="utf-8")
+    parsed = parse_markdown(content)
+    if parsed is None:
+        raise ValueError(f"素材格式无法解析: {markdown.path}")
+
+    material_version, _, _ = (markdown.prompt_version or "").partition(".")
+    title, summary, themes = parsed["title"], parsed["summary"], parsed["themes"]
+
+    redo_material = stages == "all" or (stages == "auto" and material_version != llm_parse.MATERIAL_PROMPT_VERSION)
+    if redo_material:
+        source = news.source_for_article(parsed["link"])
+        article = await source.fetch(parsed["link"]) if source else None
+        if article is not None:
+            with metrics.track_stage("gen_material"):
+                summary, themes, title = await llm_parse.gen_material(article.text, article.title)
+        elif stages == "all":
+            raise ValueError(f"原文获取失败: {parsed['link']}")
+        else:
+            logger.warning("原文获取失败，只重新生成例文: %s", parsed["link"])
+            redo_material = False
+
+    examples = await llm_parse.gen_examples(summary, themes, title)
+    if redo_material:
+        material_version = llm_parse.MATERIAL_PROMPT_VERSION
+    version = f"{material_version or LEGACY_VERSION}.{llm_parse.EXAMPLE_PROMPT_VERSION}"
+
+    material = llm_parse.LLMOutputs(is_ok=True, title=title, summary=summary, themes=themes, example=examples)
+    new_content = render_markdown(material, parsed["update_time"], parsed["source"], parsed["link"])
+    # 新版本写入新文件，旧文件在数据库更新成功后再删除
+    new_path = old_path.with_name(f"{markdown.date}_{markdown.id}_{uuid.uuid4().hex[:8]}.md")
+    await asyncio.to_thread(_write_file, new_path, new_content)
+    relative_path = str(new_path.relative_to(files_path))
+
+    try:
+        async with AsyncSessionLocal() as session:
+            # 只在记录未被删除或修改时更新
+            # noinspection PyTypeChecker
+            result = await session.execute(
+                update(Markdown)
+                .where(Markdown.id == markdown.id, Markdown.path == markdown.path)
+                .values(path=relative_path, title=title, themes=themes, prompt_version=version)
+            )
+            if result.rowcount != 1:
+                raise ValueError(f"素材已被删除或修改: {markdown.id}")
+            await session.commit()
+    except BaseException:
+        await storage.remove_files([relative_path])
+        raise
+
+    await storage.remove_files([markdown.path])
+    await related.add(markdown.id, title, summary, themes)
+    await publish.update(saved=[markdown.id])
+    return redo_material
+
+
+def _llm_totals() -> tuple[int, int]:
+    return int(sum(metrics.llm_calls_total.values.values())), int(sum(metrics.llm_tokens_total.values.values()))
+
+
+async def run_regeneration(
+        materials: list[Markdown],
+        stages: str = "auto",
+        concurrency: int = 4,
+        on_progress: Optional[Callable[[RegenerateStats], None]] = None,
+) -> RegenerateStats:
+    stats = RegenerateStats(selected=len(materials))
+    calls_before, tokens_before = _llm_totals()
+    queue: asyncio.Queue[Markdown] = asyncio.Queue()
+    for markdown in materials:
+        queue.put_nowait(markdown)
+
+    async def worker():
+        while not queue.empty():
+            markdown = queue.get_nowait()
+            try:
+                redo_material = await regenerate_material(markdown, stages)
+            except Exception as e:
+                stats.failed += 1
+                logger.exception("重新生成失败 %s: %s", markdown.id, e)
+            else:
+                stats.regenerated += 1
+                stats.material_stage += redo_material
+            stats.done += 1
+            calls, tokens = _llm_totals()
+            stats.llm_calls, stats.tokens = calls - calls_before, tokens - tokens_before
+            if on_progress:
+                on_progress(stats)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return stats
@@ -1,32 +1,34 @@
 import asyncio
 import aiohttp
+import dataclasses
 from collections import deque
-from typing import AsyncGenerator, Deque, TypedDict
+from typing import AsyncGenerator, Deque, Optional
 import logging
 
-import feedparser
-from feedparser import FeedParserDict
+from config import RSS_QUEUE_SIZE
+from core import metrics
+from gen.feed_parser import parse_feed
 
 logger = logging.getLogger(__name__)
 
 
-RSSResult = TypedDict(
-    "RSSResult",
-    {
-        "feed_url": str,
-        "title": str,
-        "link": str,
-        "published": str,
-        "entry": FeedParserDict,
-    }
-)
+@dataclasses.dataclass(slots=True, frozen=True)
+class RSSResult:
+    """
+    RSS 新条目，只保留流水线用到的字段
+    """
+    feed_url: str
+    title: Optional[str]
+    link: Optional[str]
+    published: Optional[str]
+    summary: str
 
 
-async def fetch_feed_text(session: aiohttp.ClientSession, url: str, headers: dict[str, str] = None):
+async def fetch_feed_bytes(session: aiohttp.ClientSession, url: str, headers: dict[str, str] = None) -> bytes:
+    # 保留原始字节，由解析器根据 XML 声明处理编码
     async with session.get(url, headers=headers) as resp:
         resp.raise_for_status()
-        text = await resp.text()
-        return text
+        return await resp.read()
 
 
 async def fetch_updates_from_source(
@@ -50,18 +52,20 @@ async def fetch_updates_from_source(
     try:
         while True:
             try:
-                text = await fetch_feed_text(session, rss_url)
+                with metrics.track_stage("rss_poll"):
+                    data = await fetch_feed_bytes(session, rss_url)
+                    # 已处理过的条目在解析时跳过，遇到连续的旧条目即停止
+                    entries = parse_feed(data, seen_set)
             except aiohttp.ClientError as e:
                 logger.error(f"[{rss_url}] fetch error: {e}")
                 await asyncio.sleep(interval)
                 continue
 
-            entries = feedparser.parse(text).entries
             if max_seen is None:
                 max_seen = max(50, len(entries) * 10)
 
             for entry in entries:
-                entry_id = getattr(entry, "id", None) or getattr(entry, "link", None) or entry.title
+                entry_id = entry.id
                 if entry_id in seen_set:
                     continue
 
@@ -72,15 +76,14 @@ async def fetch_updates_from_source(
                     old = seen.popleft()
                     seen_set.discard(old)
 
-                ret: RSSResult = {
-                    "feed_url": rss_url,
-                    "title": entry.get("title"),
-                    "link": entry.get("link"),
-                    "published": entry.get("published"),
-                    "entry": entry,
-                }
                 if not ignore_first:
-                    yield ret
+                    yield RSSResult(
+                        feed_url=rss_url,
+                        title=entry.title,
+                        link=entry.link,
+                        published=entry.published,
+                        summary=entry.summary,
+                    )
             ignore_first = False
             await asyncio.sleep(interval)
     finally:
@@ -92,13 +95,20 @@ async def fetch_updates_multi(
     rss_urls: list[str],
     interval: float = 60.0,
     ignore_first: bool = False,
+    intervals: Optional[dict[str, float]] = None,
 ) -> AsyncGenerator[RSSResult, None]:
+    """
+    合并多个 RSS 源的更新，intervals 可为每个源单独指定拉取间隔。
+    队列有容量上限，下游处理不过来时各源暂停拉取。
+    """
+    intervals = intervals or {}
     async with aiohttp.ClientSession() as session:
         tasks = []
-        queue = asyncio.Queue()
+        queue: asyncio.Queue[RSSResult] = asyncio.Queue(maxsize=RSS_QUEUE_SIZE)
 
         async def collect_updates(fetch_url: str):
-            async for fetch_item in fetch_updates_from_source(fetch_url, interval, session, ignore_first):
+            fetch_interval = intervals.get(fetch_url, interval)
+            async for fetch_item in fetch_updates_from_source(fetch_url, fetch_interval, session, ignore_first):
                 await queue.put(fetch_item)
 
         for url in rss_urls:
@@ -0,0 +1,141 @@
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/html",
+    "text/plain",
+    "text/css",
+    "text/markdown",
+    "application/json",
+    "application/javascript",
+    "application/x-ndjson",
+)
+
+
+def parse_accept_encoding(header: str) -> dict[str, float]:
+    """
+    解析 Accept-Encoding，返回 编码 -> q 值，无法解析的 q 值视为 0
+    """
+    result = {}
+    for item in header.split(","):
+        name, *params = item.split(";")
+        if not (name := name.strip().lower()):
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        result[name] = q
+    return result
+
+
+def _accepts(accepted: dict[str, float], encoding: str) -> bool:
+    # 未列出的编码按 * 的 q 值处理
+    return accepted.get(encoding, accepted.get("*", 0.0)) > 0
+
+
+class CompressionMiddleware:
+    """
+    gzip/brotli 响应压缩。
+    SSE、已编码、带 Content-Range 的响应以及小于 minimum_size 的单块响应不压缩，
+    流式响应逐块压缩并立即刷新。
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 500, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = parse_accept_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if brotli is not None and _accepts(accepted, "br"):
+            encoding = "br"
+        elif _accepts(accepted, "gzip"):
+            encoding = "gzip"
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, send, encoding)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, send: Send, encoding: str):
+        self.middleware = middleware
+        self.downstream = send
+        self.encoding = encoding
+        self.start_message: Optional[Message] = None
+        self.compressor = None
+        self.passthrough = False
+
+    def _compressible(self, message: Message) -> bool:
+        headers = Headers(raw=message["headers"])
+        content_type = headers.get("content-type", "").split(";")[0].strip()
+        return (
+            message["status"] not in (204, 206, 304)
+            and content_type in COMPRESSIBLE_TYPES
+            and "content-encoding" not in headers
+            and "content-range" not in headers
+        )
+
+    def _compress(self, data: bytes, more_body: bool) -> bytes:
+        if self.encoding == "br":
+            out = self.compressor.process(data)
+            return out + (self.compressor.flush() if more_body else self.compressor.finish())
+        out = self.compressor.compress(data)
+        return out + self.compressor.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+
+    async def send(self, message: Message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            if not self._compressible(message):
+                self.passthrough = True
+                await self.downstream(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            if not more_body and len(body) < self.middleware.minimum_size:
+                self.passthrough = True
+                await self.downstream(self.start_message)
+                await self.downstream(message)
+                return
+            if self.encoding == "br":
+                self.compressor = brotli.Compressor(quality=self.middleware.brotli_quality)
+            else:
+                self.compressor = zlib.compressobj(self.middleware.gzip_level, zlib.DEFLATED, 31)
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            del headers["content-length"]
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            await self.downstream(self.start_message)
+
+        await self.downstream({
+            "type": "http.response.body",
+            "body": self._compress(body, more_body),
+            "more_body": more_body,
+        })
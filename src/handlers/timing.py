@@ -0,0 +1,103 @@
+import contextvars
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config import SLOW_REQUEST_THRESHOLD
+from core import metrics
+from db.db import engine
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_time = 0.0
+        self.db_queries = 0
+
+
+# 当前请求的计时，数据库事件中累加 SQL 耗时
+_current: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar("request_timings", default=None)
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    if (timings := _current.get()) is not None:
+        timings.db_time += elapsed
+        timings.db_queries += 1
+
+
+def _route_name(scope: Scope) -> str:
+    # 使用路由模板而不是实际路径，避免标签数量随素材 id 增长
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class TimingMiddleware:
+    """
+    记录每个请求的耗时、数据库耗时与认证耗时，写入 Server-Timing 响应头与按路由统计的指标，
+    超过 SLOW_REQUEST_THRESHOLD 的请求记录慢请求日志。SSE 等长连接不计入延迟统计。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        status = 500
+        streaming = False
+
+        async def send_wrapper(message: Message):
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                streaming = headers.get("content-type", "").startswith("text/event-stream")
+                headers.append("Server-Timing", self._server_timing(scope, timings))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            self._record(scope, timings, status, streaming)
+
+    @staticmethod
+    def _server_timing(scope: Scope, timings: RequestTimings) -> str:
+        total = time.perf_counter() - timings.start
+        parts = [f"total;dur={total * 1000:.2f}", f"db;dur={timings.db_time * 1000:.2f}"]
+        auth_time = scope.get("state", {}).get("auth_time")
+        if auth_time is not None:
+            parts.append(f"auth;dur={auth_time * 1000:.2f}")
+        return ", ".join(parts)
+
+    @staticmethod
+    def _record(scope: Scope, timings: RequestTimings, status: int, streaming: bool):
+        route, method = _route_name(scope), scope["method"]
+        metrics.http_requests_total.inc(route=route, method=method, status=str(status))
+        if streaming:
+            return
+        total = time.perf_counter() - timings.start
+        metrics.http_request_seconds.observe(total, route=route, method=method)
+        metrics.http_db_seconds.observe(timings.db_time, route=route)
+        if total > SLOW_REQUEST_THRESHOLD:
+            logger.warning(
+                f"慢请求 {method} {scope['path']} ({route}) {status}: {total * 1000:.0f}ms, "
+                f"数据库 {timings.db_time * 1000:.0f}ms / {timings.db_queries} 次查询"
+            )
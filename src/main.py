@@ -5,9 +5,10 @@ from starlette.exceptions import HTTPException
 
 from db import db
 from gen import news
+from gen.budget import budget
 import routers
-from handlers import exceptions
-from core import logger
+from handlers import compression, exceptions, timing
+from core import logger, profiling, publish, static, template
 
 # Default UA
 user_agent = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -17,9 +18,15 @@ user_agent = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
 async def lifespan(_: FastAPI):
     news.set_user_agent(user_agent)
     await db.init_db()
+    template.precompile_templates()
+    profiling.loop_monitor.start()
     yield
+    profiling.loop_monitor.stop()
     if routers.apis.generator.task:
         routers.apis.generator.task.cancel()
+    await publish.flush()
+    logger.store_handler.close()
+    budget.flush()
 
 
 app = FastAPI(
@@ -33,8 +40,17 @@ app.include_router(routers.pages.index.router)
 app.include_router(routers.pages.user.router)
 app.include_router(routers.pages.view.router, prefix="/view")
 app.include_router(routers.apis.article.router, prefix="/api/articles")
+app.include_router(routers.apis.material.router, prefix="/api/materials")
 app.include_router(routers.apis.generator.router, prefix="/api/generator")
 app.include_router(routers.apis.user.router, prefix="/api/users")
+app.include_router(routers.apis.logs.router, prefix="/api/logs")
+app.include_router(routers.apis.metrics.router, prefix="/metrics")
+app.include_router(routers.apis.sources.router, prefix="/api/sources")
+
+app.mount("/static", static.HashedStaticFiles(directory=static.static_path, check_dir=False), name="static")
+
+app.add_middleware(timing.TimingMiddleware)
+app.add_middleware(compression.CompressionMiddleware)
 
 app.add_exception_handler(Exception, exceptions.internal_exception_handler)
 # noinspection PyTypeChecker
@@ -1,3 +1,7 @@
 import routers.apis.article
 import routers.apis.generator
+import routers.apis.logs
+import routers.apis.material
+import routers.apis.metrics
+import routers.apis.sources
 import routers.apis.user
@@ -1,17 +1,25 @@
+import datetime
+import re
 from math import ceil
+from typing import AsyncIterator, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import func
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query
+from pydantic import BaseModel, ConfigDict, Field
+from sqlalchemy import delete, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, StreamingResponse
 
+from core import export, publish, related
 from core.user import require_role
+from db import storage
 from db.models import Markdown, UserRole
-from db.db import db as database
+from db.db import AsyncSessionLocal, db as database, files_path
 
 router = APIRouter()
 
+BULK_BATCH_SIZE = 500
+
 
 @router.get("/")
 async def get_articles(
@@ -39,18 +47,160 @@ async def get_articles(
     }
 
 
+async def export_rows(
+    start: Optional[datetime.date],
+    end: Optional[datetime.date],
+    theme: Optional[str]
+) -> AsyncIterator[export.ExportRow]:
+    stmt = select(
+        Markdown.id, Markdown.date, Markdown.path, Markdown.title, Markdown.themes, Markdown.created_at
+    ).order_by(Markdown.date, Markdown.id)
+    if start:
+        stmt = stmt.where(Markdown.date >= start.isoformat())
+    if end:
+        stmt = stmt.where(Markdown.date <= end.isoformat())
+    if theme:
+        stmt = stmt.where(Markdown.themes.contains(theme))
+
+    # 使用服务端游标逐批读取，不一次性加载所有记录
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(stmt.execution_options(yield_per=500))
+        async for row in result:
+            yield export.ExportRow(*row)
+
+
+range_pattern = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(range_header: str, total: int) -> tuple[int, int]:
+    match = range_pattern.match(range_header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        raise HTTPException(status_code=416, detail="Invalid range")
+    first, last = match.groups()
+    if first == "":
+        # bytes=-N 表示最后 N 个字节
+        start, end = max(total - int(last), 0), total - 1
+    else:
+        start = int(first)
+        end = min(int(last), total - 1) if last else total - 1
+    if start > end or start >= total:
+        raise HTTPException(status_code=416, detail="Range not satisfiable")
+    return start, end
+
+
+@router.get("/export")
+async def export_articles(
+    format: str = Query("zip", pattern="^(zip|jsonl)$"),
+    start: Optional[datetime.date] = Query(None, description="起始日期"),
+    end: Optional[datetime.date] = Query(None, description="结束日期"),
+    theme: Optional[str] = Query(None, description="主题关键词"),
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_range: Optional[str] = Header(None),
+    _: dict = Depends(require_role(UserRole.Admin))
+):
+    filename = f"materials_{start or 'all'}_{end or 'all'}.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+    if format == "jsonl":
+        # JSONL 的长度需要读取全部内容才能确定，不支持断点续传
+        headers["Accept-Ranges"] = "none"
+        return StreamingResponse(
+            export.stream_jsonl(export_rows(start, end, theme), files_path),
+            media_type="application/x-ndjson",
+            headers=headers
+        )
+
+    # ZIP 条目不压缩且输出确定，可预先计算总长度并按 Range 重新生成所需部分
+    # 长度、ETag 与输出内容使用同一份素材快照
+    entries = await export.snapshot(export_rows(start, end, theme), files_path)
+    total, digest = export.zip_length(entries)
+    etag = f'"{digest}"'
+    headers.update({"Accept-Ranges": "bytes", "ETag": etag})
+    chunks = export.stream_zip(entries, files_path)
+
+    if range_header and (not if_range or if_range == etag):
+        first, last = parse_range(range_header, total)
+        headers["Content-Range"] = f"bytes {first}-{last}/{total}"
+        headers["Content-Length"] = str(last - first + 1)
+        return StreamingResponse(
+            export.slice_stream(chunks, first, last),
+            status_code=206,
+            media_type="application/zip",
+            headers=headers
+        )
+
+    headers["Content-Length"] = str(total)
+    return StreamingResponse(chunks, media_type="application/zip", headers=headers)
+
+
+class BulkDeleteRequest(BaseModel):
+    # 拒绝拼错的字段，避免条件被忽略后删除范围比预期更大
+    model_config = ConfigDict(extra="forbid")
+
+    ids: Optional[list[str]] = Field(None, min_length=1)
+    start: Optional[datetime.date] = None
+    end: Optional[datetime.date] = None
+    source: Optional[str] = Field(None, min_length=1)
+
+
+@router.post("/bulk-delete")
+async def bulk_delete_articles(
+    data: BulkDeleteRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(database),
+    _: dict = Depends(require_role(UserRole.Admin))
+):
+    """
+    批量删除素材，支持按 id 列表、日期范围（start/end）或来源（source）删除，
+    对应的文件在后台分批删除
+    """
+    ids, start, end, source = data.ids, data.start, data.end, data.source
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start is after end")
+
+    conditions = []
+    if start:
+        conditions.append(Markdown.date >= start.isoformat())
+    if end:
+        conditions.append(Markdown.date <= end.isoformat())
+    if source:
+        conditions.append(Markdown.source == source)
+    if not ids and not conditions:
+        raise HTTPException(status_code=400, detail="Missing ids, date range or source")
+
+    rows = []
+    if ids:
+        # 分批避免超出 SQLite 参数数量限制
+        for i in range(0, len(ids), BULK_BATCH_SIZE):
+            stmt = delete(Markdown).where(Markdown.id.in_(ids[i:i + BULK_BATCH_SIZE]), *conditions)
+            result = await db.execute(stmt.returning(Markdown.id, Markdown.path))
+            rows.extend(result.all())
+    else:
+        result = await db.execute(delete(Markdown).where(*conditions).returning(Markdown.id, Markdown.path))
+        rows.extend(result.all())
+    await db.commit()
+
+    background_tasks.add_task(storage.remove_files, [row.path for row in rows])
+    background_tasks.add_task(related.remove, [row.id for row in rows])
+    background_tasks.add_task(publish.update, deleted=[row.id for row in rows])
+    return {"deleted": len(rows)}
+
+
 @router.delete("/{article_id}")
 async def delete_article(
     article_id: str,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(database),
     _: dict = Depends(require_role(UserRole.Admin))
 ):
     # noinspection PyTypeChecker
-    result = await db.execute(select(Markdown).where(Markdown.id == article_id))
-    article = result.scalar_one_or_none()
-    if not article:
+    result = await db.execute(delete(Markdown).where(Markdown.id == article_id).returning(Markdown.path))
+    path = result.scalar_one_or_none()
+    if not path:
         raise HTTPException(status_code=404, detail="Article not found")
-
-    await db.delete(article)
     await db.commit()
-    return JSONResponse(status_code=204, content=None)
\ No newline at end of file
+
+    background_tasks.add_task(storage.remove_files, [path])
+    background_tasks.add_task(related.remove, [article_id])
+    background_tasks.add_task(publish.update, deleted=[article_id])
+    return JSONResponse(status_code=204, content=None)
@@ -1,10 +1,10 @@
 import asyncio
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
 from starlette.responses import StreamingResponse
 
-from core.logger import sse_handler
+from core.logger import LogItem, sse_handler
 from core.user import require_role
 from db.models import UserRole
 import gen.rss
@@ -23,13 +23,27 @@ async def start_generation_task(
     global task, first_start
     if task:
         return {"code": 403, "msg": "生成器已经启动"}
-    rss = gen.rss.fetch_updates_multi(gen.news.get_all_rss_urls(), ignore_first=not first_start)
+    rss = gen.rss.fetch_updates_multi(
+        gen.news.get_all_rss_urls(),
+        ignore_first=not first_start,
+        intervals=gen.news.get_poll_intervals()
+    )
     first_start = False
     gen.set_rss_obj(rss)
     task = asyncio.create_task(gen.generation())
+    task.add_done_callback(_on_generation_done)
     return {"code": 200, "msg": ""}
 
 
+def _on_generation_done(done: asyncio.Task):
+    # 生成器自行退出（RSS 结束或出错，错误已记录日志）后允许重新启动
+    global task
+    if not done.cancelled():
+        done.exception()
+    if task is done:
+        task = None
+
+
 @router.post("/stop")
 async def start_generation_task(
     _: dict = Depends(require_role(UserRole.Admin))
@@ -46,18 +60,37 @@ async def start_generation_task(
     return {"code": 200, "msg": ""}
 
 
+def format_event(item: LogItem) -> str:
+    return f"id: {sse_handler.epoch}-{item.seq}\ndata: {item.message}\n\n"
+
+
+def parse_event_id(last_event_id: Optional[str]) -> Optional[int]:
+    """
+    解析 Last-Event-ID，格式为 "启动标识-序号"，来自重启前或无法解析时返回 None
+    """
+    epoch, _, seq = (last_event_id or "").partition("-")
+    if epoch != sse_handler.epoch:
+        return None
+    try:
+        return int(seq)
+    except ValueError:
+        return None
+
+
 @router.get("/logs")
-async def stream_logs():
-    queue = sse_handler.subscribe()
+async def stream_logs(last_event_id: Optional[str] = Header(None)):
+    subscriber = sse_handler.subscribe(parse_event_id(last_event_id))
 
     async def event_generator():
         try:
-            for line in sse_handler.get_history():
-                yield f"data: {line}\n\n"
+            # 首次连接先发送历史日志，重连时只补发遗漏的部分
+            if not subscriber.resumed:
+                for item in sse_handler.get_history(before=subscriber.cursor):
+                    yield format_event(item)
             while True:
-                msg = await queue.get()
-                yield f"data: {msg}\n\n"
+                items = await subscriber.get()
+                yield "".join(format_event(item) for item in items)
         finally:
-            sse_handler.unsubscribe(queue)
+            sse_handler.unsubscribe(subscriber)
 
     return StreamingResponse(event_generator(), media_type="text/event-stream")
\ No newline at end of file
@@ -0,0 +1,25 @@
+import asyncio
+import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+
+from core.log_store import query_logs
+from core.user import require_role
+from db.models import UserRole
+
+router = APIRouter()
+
+
+@router.get("/")
+async def get_logs(
+    stage: Optional[str] = Query(None, description="流水线阶段"),
+    level: Optional[str] = Query(None, description="日志级别，如 INFO/WARNING/ERROR"),
+    article: Optional[str] = Query(None, description="文章链接"),
+    start: Optional[datetime.datetime] = Query(None, description="起始时间"),
+    end: Optional[datetime.datetime] = Query(None, description="结束时间"),
+    limit: int = Query(200, ge=1, le=2000),
+    _: dict = Depends(require_role(UserRole.Admin))
+):
+    items = await asyncio.to_thread(query_logs, stage, level, article, start, end, limit)
+    return {"count": len(items), "items": items}
@@ -0,0 +1,170 @@
+import asyncio
+import hashlib
+from pathlib import Path
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.responses import JSONResponse, Response
+
+from core import related
+from core.user import require_role
+from db.db import db as database, files_path
+from db.models import Markdown, UserRole
+from gen.post_processing import parse_markdown
+
+router = APIRouter()
+
+MAX_BATCH_SIZE = 100
+
+# 数据库中的字段
+RECORD_FIELDS = ("id", "title", "date", "themes", "source", "created_at")
+# 需要读取文件解析得到的字段
+CONTENT_FIELDS = ("summary", "examples", "update_time", "link", "content")
+ALL_FIELDS = RECORD_FIELDS + CONTENT_FIELDS
+
+
+def parse_fields(fields: Optional[str]) -> tuple[str, ...]:
+    if not fields:
+        return ALL_FIELDS
+    selected = tuple(f.strip() for f in fields.split(",") if f.strip())
+    unknown = [f for f in selected if f not in ALL_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return selected
+
+
+def _stat(path: Path) -> Optional[tuple[int, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _etag(markdown: Markdown, stat: tuple[int, int], fields: tuple[str, ...]) -> str:
+    # 由创建时间与文件的修改时间、大小生成，无需读取文件内容
+    raw = f"{markdown.id}:{markdown.created_at}:{stat[0]}:{stat[1]}:{','.join(fields)}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+
+def _load(markdowns: list[Markdown], fields: tuple[str, ...]) -> list[tuple[Markdown, Optional[str], dict]]:
+    """
+    在线程中读取文件，返回 (记录, ETag, 字段)，文件丢失时 ETag 为 None
+    """
+    need_content = any(f in CONTENT_FIELDS for f in fields)
+    result = []
+    for markdown in markdowns:
+        file_path = files_path / Path(markdown.path)
+        stat = _stat(file_path)
+        if stat is None:
+            result.append((markdown, None, {}))
+            continue
+        item = {f: getattr(markdown, f) for f in fields if f in RECORD_FIELDS}
+        if need_content:
+            content = file_path.read_text(encoding="utf-8")
+            parsed = parse_markdown(content) or {}
+            for f in fields:
+                if f == "content":
+                    item[f] = content
+                elif f in CONTENT_FIELDS:
+                    item[f] = parsed.get(f)
+        if "created_at" in item and item["created_at"] is not None:
+            item["created_at"] = item["created_at"].isoformat()
+        result.append((markdown, _etag(markdown, stat, fields), item))
+    return result
+
+
+def _not_modified(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+@router.get("/")
+async def get_materials(
+    ids: str = Query(..., description="素材 id，用逗号分隔"),
+    fields: Optional[str] = Query(None, description="返回的字段，用逗号分隔"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(database),
+    _: dict = Depends(require_role(UserRole.User))
+):
+    """
+    批量获取素材内容，结果顺序与 ids 一致，不存在的 id 列在 missing 中
+    """
+    selected = parse_fields(fields)
+    id_list = list(dict.fromkeys(i.strip() for i in ids.split(",") if i.strip()))
+    if not id_list or len(id_list) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"ids must contain 1-{MAX_BATCH_SIZE} items")
+
+    # noinspection PyTypeChecker
+    result = await db.execute(select(Markdown).where(Markdown.id.in_(id_list)))
+    found = {m.id: m for m in result.scalars().all()}
+    loaded = await asyncio.to_thread(_load, [found[i] for i in id_list if i in found], selected)
+
+    items = [item for _, etag, item in loaded if etag]
+    tags = [etag for _, etag, _ in loaded if etag]
+    loaded_ids = {markdown.id for markdown, etag, _ in loaded if etag}
+    missing = [i for i in id_list if i not in loaded_ids]
+
+    etag = '"' + hashlib.sha1(f"{','.join(tags)}|{','.join(missing)}".encode()).hexdigest()[:20] + '"'
+    if _not_modified(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return JSONResponse({"items": items, "missing": missing}, headers={"ETag": etag})
+
+
+@router.get("/{md_id}/related")
+async def get_related_materials(
+    md_id: str,
+    k: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(database),
+    _: dict = Depends(require_role(UserRole.User))
+):
+    """
+    返回最相似的 k 条素材，按相似度降序
+    """
+    similar = await related.similar(md_id, k)
+    if similar is None:
+        raise HTTPException(status_code=404, detail="Material not indexed")
+    # 索引中可能残留已在别处删除的素材，以数据库为准
+    # noinspection PyTypeChecker
+    result = await db.execute(
+        select(Markdown.id, Markdown.title, Markdown.date).where(Markdown.id.in_([i for i, _ in similar]))
+    )
+    found = {row.id: row for row in result.all()}
+    return {"items": [
+        {"id": i, "title": found[i].title, "date": found[i].date, "score": round(score, 4)}
+        for i, score in similar if i in found
+    ]}
+
+
+@router.get("/{md_id}")
+async def get_material(
+    md_id: str,
+    fields: Optional[str] = Query(None, description="返回的字段，用逗号分隔"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(database),
+    _: dict = Depends(require_role(UserRole.User))
+):
+    selected = parse_fields(fields)
+    # noinspection PyTypeChecker
+    result = await db.execute(select(Markdown).where(Markdown.id == md_id))
+    markdown = result.scalar_one_or_none()
+    if not markdown:
+        raise HTTPException(status_code=404, detail="Markdown not found")
+
+    file_path = files_path / Path(markdown.path)
+    stat = await asyncio.to_thread(_stat, file_path)
+    if stat is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    etag = f'"{_etag(markdown, stat, selected)}"'
+    # 内容未变化时不读取文件
+    if _not_modified(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    [(_, item_etag, item)] = await asyncio.to_thread(_load, [markdown], selected)
+    if item_etag is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    return JSONResponse(item, headers={"ETag": etag})
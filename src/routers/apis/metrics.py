@@ -0,0 +1,51 @@
+import asyncio
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Cookie, Depends, HTTPException, Query
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+from config import METRICS_PUBLIC, PROFILE_MAX_SECONDS
+from core import metrics, profiling
+from core.user import get_current_user, require_role
+from db.models import UserRole
+from gen.budget import budget
+
+router = APIRouter()
+
+
+def metrics_auth(request: Request, token: Optional[str] = Cookie(None)):
+    if METRICS_PUBLIC:
+        return None
+    return require_role(UserRole.Admin)(get_current_user(request, token))
+
+
+@router.get("/", response_class=PlainTextResponse)
+async def get_metrics(_: dict = Depends(metrics_auth)):
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/summary")
+async def get_metrics_summary(_: dict = Depends(require_role(UserRole.Admin))):
+    return metrics.summary()
+
+
+@router.get("/budget")
+async def get_budget(_: dict = Depends(require_role(UserRole.Admin))):
+    return budget.status()
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def get_profile(
+    seconds: float = Query(10, gt=0, le=PROFILE_MAX_SECONDS),
+    _: dict = Depends(require_role(UserRole.Admin))
+):
+    """
+    采样所有线程 seconds 秒，下载折叠栈文件，可用 flamegraph.pl 或 speedscope 查看
+    """
+    stacks = await asyncio.to_thread(profiling.sample, seconds)
+    if stacks is None:
+        raise HTTPException(status_code=409, detail="已有正在进行的采样")
+    filename = f"profile-{time.strftime('%Y%m%d-%H%M%S')}.folded"
+    return PlainTextResponse(stacks, headers={"Content-Disposition": f'attachment; filename="{filename}"'})
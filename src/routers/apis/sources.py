@@ -0,0 +1,50 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+
+from core.user import require_role
+from db.models import UserRole
+from gen.news import registry
+
+router = APIRouter()
+
+
+@router.get("/")
+async def list_sources(_: dict = Depends(require_role(UserRole.Admin))):
+    return {
+        "items": [
+            {"name": source.name, "feed_urls": source.feed_urls, **source.settings()}
+            for source in registry.sources.values()
+        ]
+    }
+
+
+class SourceSettings(BaseModel):
+    # 严格模式下不做类型转换，"false" 不会变成 True，2.7 也不会被截断为 2
+    model_config = ConfigDict(extra="forbid", strict=True)
+
+    poll_interval: Optional[float] = Field(None, gt=0)
+    concurrency: Optional[int] = Field(None, ge=1)
+    rate_limit: Optional[float] = Field(None, ge=0)
+    enabled: Optional[bool] = None
+
+
+@router.put("/{name}")
+async def update_source(
+    name: str,
+    data: dict,
+    _: dict = Depends(require_role(UserRole.Admin))
+):
+    source = registry.sources.get(name)
+    if not source:
+        raise HTTPException(status_code=404, detail="Source not found")
+    try:
+        settings = SourceSettings.model_validate(data)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid settings: {e.errors(include_url=False)}")
+    try:
+        registry.apply_settings(source, settings.model_dump(exclude_none=True))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid settings")
+    return {"message": "Source updated successfully", **source.settings()}
@@ -5,7 +5,7 @@ from sqlalchemy import func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from core.user import hash_password, require_role
+from core.user import hash_password_async, require_role
 from db.db import db as database
 from db.models import User, UserRole
 
@@ -56,7 +56,7 @@ async def create_user(
     if result.scalar_one_or_none():
         raise HTTPException(status_code=400, detail="User already exists")
 
-    new_user = User(username=username, password=hash_password(password), role=role)
+    new_user = User(username=username, password=await hash_password_async(password), role=role)
     db.add(new_user)
     await db.commit()
     return {"message": "User created successfully"}
@@ -96,7 +96,7 @@ async def update_password(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user.password = hash_password(password)
+    user.password = await hash_password_async(password)
     db.add(user)
     await db.commit()
     return {"message": "Password updated successfully"}
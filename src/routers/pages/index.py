@@ -1,7 +1,6 @@
 from typing import Optional
 
 from fastapi import APIRouter, Cookie, Depends
-from jose import JWTError
 from starlette.requests import Request
 from starlette.responses import HTMLResponse
 
@@ -15,14 +14,9 @@ router = APIRouter()
 
 @router.get("/", response_class=HTMLResponse)
 async def index(request: Request, token: Optional[str] = Cookie(None)):
-    user_obj = None
-    if token:
-        try:
-            user_obj = user.get_current_user_by_default(token)
-            if user_obj:
-                user_obj["role"] = UserRole(int(user_obj["role"])).name
-        except JWTError:
-            user_obj = None
+    user_obj = user.get_current_user_by_default(token)
+    if user_obj:
+        user_obj["role"] = UserRole(int(user_obj["role"])).name
     return templates.TemplateResponse("index.html", {"request": request, "user": user_obj})
 
 
@@ -25,7 +25,7 @@ async def login_post(request: Request, username: str = Form(...), password: str
         result = await session.execute(stmt)
         user_obj = result.scalar_one_or_none()  # 返回单个对象或None
 
-        if not user_obj or not user.verify_password(password, user_obj.password):
+        if not user_obj or not await user.verify_password_async(password, user_obj.password):
             return templates.TemplateResponse(
                 "user/login.html",
                 {"request": request, "error": "Invalid credentials"}
@@ -80,7 +80,7 @@ async def register_post(
                 {"request": request, "error": "Username already exists"}
             )
 
-        new_user = User(username=username, password=User.hash_password(password), role="user")
+        new_user = User(username=username, password=await user.hash_password_async(password), role="user")
         session.add(new_user)
         await session.commit()
 
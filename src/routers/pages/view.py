@@ -48,5 +48,5 @@ async def view_markdown(
 
     return templates.TemplateResponse(
         "view/view_md.html",
-        {"request": request, "title": markdown.title, "content": content}
+        {"request": request, "md_id": markdown.id, "title": markdown.title, "content": content}
     )
\ No newline at end of file